@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+User = get_user_model()
+
+
+def user_cache():
+    return caches[settings.SESSION_CACHE_ALIAS]
+
+
+def user_key(user_id):
+    return f'auth-user:{user_id}'
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который берёт пользователя сессии из кэша.
+
+    Запись сбрасывается при любом сохранении или удалении пользователя,
+    в том числе при смене пароля и входе (обновление ``last_login``).
+    С кэшем, локальным для процесса, другие процессы видят изменения
+    не позже ``USER_CACHE_TIMEOUT``; для нескольких процессов
+    ``SESSION_CACHE_ALIAS`` должен указывать на общий кэш.
+    """
+
+    def get_user(self, user_id):
+        cache = user_cache()
+        key = user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(key, user, timeout=settings.USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
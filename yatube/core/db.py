@@ -0,0 +1,27 @@
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+_write_lock = threading.Lock()
+
+
+@contextmanager
+def serialized_write(using=DEFAULT_DB_ALIAS):
+    """Короткая транзакция записи, по одной на процесс за раз.
+
+    SQLite допускает одного писателя на файл: потоки одного процесса,
+    одновременно начавшие запись, крутились бы в ``busy_timeout`` и
+    получали «database is locked». Здесь они ждут на блокировке процесса,
+    а с другими процессами разбирается ``busy_timeout``. Внутри блока
+    стоит делать только запись, без рендеринга и сетевых вызовов.
+    """
+    if (not settings.SQLITE_SERIALIZE_WRITES
+            or connections[using].vendor != 'sqlite'):
+        with transaction.atomic(using=using):
+            yield
+        return
+    with _write_lock:
+        with transaction.atomic(using=using):
+            yield
@@ -0,0 +1,47 @@
+import re
+
+from django.conf import settings
+from django.template.loaders import app_directories, filesystem
+
+COMMENT_RE = re.compile(r'<!--.*?-->', re.S)
+# переводы строк вместе с отступами вокруг них
+NEWLINE_RE = re.compile(r'[ \t]*\n\s*')
+# внутри этих тегов пробелы значимы и не трогаются
+PRESERVE_RE = re.compile(r'(<(pre|textarea|script)\b.*?</\2>)', re.S | re.I)
+
+
+def minify(source):
+    """Убирает из исходника шаблона HTML-комментарии и отступы.
+
+    Комментарии, начинающиеся с префиксов ``TEMPLATE_KEEP_COMMENTS``,
+    остаются: на них опирается, например, кэш страниц. Пробелы внутри
+    строки не схлопываются, поэтому вывод тегов и переменных не меняется.
+    """
+    keep = tuple(settings.TEMPLATE_KEEP_COMMENTS)
+
+    def drop_comment(match):
+        comment = match.group(0)
+        return comment if comment.startswith(keep) else ''
+
+    parts = PRESERVE_RE.split(source)
+    result = []
+    # split с двумя группами даёт тройки: текст, блок, имя тега
+    for i in range(0, len(parts), 3):
+        text = COMMENT_RE.sub(drop_comment, parts[i])
+        result.append(NEWLINE_RE.sub('\n', text))
+        if i + 1 < len(parts):
+            result.append(parts[i + 1])
+    return ''.join(result)
+
+
+class MinifyMixin:
+    def get_contents(self, origin):
+        return minify(super().get_contents(origin))
+
+
+class FilesystemLoader(MinifyMixin, filesystem.Loader):
+    """Загрузчик из ``DIRS``, сжимающий шаблон при компиляции."""
+
+
+class AppDirectoriesLoader(MinifyMixin, app_directories.Loader):
+    """Загрузчик из ``templates`` приложений, сжимающий шаблон."""
@@ -0,0 +1,137 @@
+"""Очередь исходящей почты.
+
+``QueuedEmailBackend`` в запросе только записывает письма в таблицу
+``OutboxMessage``; доставляет их команда ``send_queued_mail`` через
+настоящий бэкенд из ``OUTBOX_EMAIL_BACKEND``, открывая одно соединение
+на пачку писем.
+"""
+import base64
+import json
+from datetime import timedelta
+from email import message_from_bytes
+from email.message import Message
+from email.mime.base import MIMEBase
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.utils import timezone
+
+from .models import OutboxMessage
+
+
+class ParsedMIME(MIMEBase):
+    """Готовая MIME-часть, восстановленная из байтов.
+
+    EmailMessage.attach() принимает части только классов MIMEBase,
+    а парсер email создаёт их без аргументов конструктора.
+    """
+
+    def __init__(self):
+        Message.__init__(self)
+
+
+def encode(content):
+    if isinstance(content, str):
+        content = content.encode()
+    return base64.b64encode(content).decode()
+
+
+def serialize(message):
+    attachments = []
+    for attachment in message.attachments:
+        if isinstance(attachment, MIMEBase):
+            # готовая MIME-часть хранится целиком, с заголовками
+            attachments.append({'mime': encode(attachment.as_bytes())})
+            continue
+        filename, content, mimetype = attachment
+        attachments.append([filename, encode(content), mimetype])
+    return json.dumps({
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': message.to,
+        'cc': message.cc,
+        'bcc': message.bcc,
+        'reply_to': message.reply_to,
+        'headers': message.extra_headers,
+        'alternatives': getattr(message, 'alternatives', []),
+        'attachments': attachments,
+    }, ensure_ascii=False)
+
+
+def deserialize(data):
+    data = json.loads(data)
+    attachments = data.pop('attachments')
+    message = EmailMultiAlternatives(
+        alternatives=[tuple(item) for item in data.pop('alternatives')],
+        **data)
+    for attachment in attachments:
+        if isinstance(attachment, dict):
+            message.attach(message_from_bytes(
+                base64.b64decode(attachment['mime']), _class=ParsedMIME))
+            continue
+        filename, content, mimetype = attachment
+        # attach() вернёт текстовым вложениям str, как было до очереди
+        message.attach(filename, base64.b64decode(content), mimetype)
+    return message
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Кладёт письма в очередь вместо отправки."""
+
+    def send_messages(self, email_messages):
+        rows = [OutboxMessage(data=serialize(message))
+                for message in email_messages if message.recipients()]
+        OutboxMessage.objects.bulk_create(rows)
+        return len(rows)
+
+
+def retry_delay(attempts):
+    """Отсрочка перед следующей попыткой растёт вдвое с каждой ошибкой."""
+
+    return timedelta(
+        seconds=settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def deliver(batch_size=None):
+    """Отправляет одну пачку готовых к отправке писем.
+
+    Отправленные письма удаляются из очереди, неудачные получают отсрочку;
+    после ``OUTBOX_MAX_ATTEMPTS`` попыток письмо остаётся в таблице
+    с текстом ошибки. Возвращает пару (отправлено, ошибок).
+    """
+    now = timezone.now()
+    batch = list(OutboxMessage.objects.filter(
+        send_after__lte=now,
+        attempts__lt=settings.OUTBOX_MAX_ATTEMPTS,
+    )[:batch_size or settings.OUTBOX_BATCH_SIZE])
+    if not batch:
+        return 0, 0
+    sent, failed = [], []
+    connection = get_connection(settings.OUTBOX_EMAIL_BACKEND)
+    try:
+        connection.open()
+    except Exception as error:
+        # сервер недоступен: вся пачка ждёт следующей попытки
+        failed = [(row, error) for row in batch]
+    else:
+        try:
+            for row in batch:
+                try:
+                    message = deserialize(row.data)
+                    message.connection = connection
+                    message.send()
+                except Exception as error:
+                    failed.append((row, error))
+                else:
+                    sent.append(row.pk)
+        finally:
+            connection.close()
+    OutboxMessage.objects.filter(pk__in=sent).delete()
+    for row, error in failed:
+        row.attempts += 1
+        row.last_error = f'{type(error).__name__}: {error}'
+        row.send_after = now + retry_delay(row.attempts)
+        row.save(update_fields=['attempts', 'last_error', 'send_after'])
+    return len(sent), len(failed)
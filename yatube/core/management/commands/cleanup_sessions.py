@@ -0,0 +1,30 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = ('Удаляет просроченные сессии пачками, отпуская базу между '
+            'пачками, чтобы не блокировать запись на всё время очистки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0.1,
+                            help='Пауза между пачками, секунды')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        total = 0
+        while True:
+            keys = list(Session.objects.filter(
+                expire_date__lt=now,
+            ).values_list('pk', flat=True)[:options['chunk_size']])
+            if not keys:
+                break
+            total += Session.objects.filter(pk__in=keys).delete()[0]
+            if len(keys) < options['chunk_size']:
+                break
+            time.sleep(options['pause'])
+        self.stdout.write(f'Удалено сессий: {total}')
@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.profiling import make_token
+
+
+class Command(BaseCommand):
+    help = ('Печатает значение заголовка X-Profile-Token, с которым запрос '
+            'будет профилирован.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(make_token())
+        self.stderr.write(
+            f'Токен действует {settings.PROFILING_TOKEN_MAX_AGE} с')
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.mail import deliver
+
+
+class Command(BaseCommand):
+    help = ('Отправляет письма из очереди QueuedEmailBackend пачками, '
+            'по одному соединению на пачку. Рассчитана на один запущенный '
+            'экземпляр.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int,
+                            help='По умолчанию OUTBOX_BATCH_SIZE')
+        parser.add_argument('--interval', type=float, default=0,
+                            help='Проверять очередь каждые N секунд, '
+                                 'пока не прервут')
+
+    def handle(self, *args, **options):
+        while True:
+            while True:
+                sent, failed = deliver(options['batch_size'])
+                if sent or failed:
+                    self.stdout.write(
+                        f'Отправлено: {sent}, ошибок: {failed}')
+                # пачка с ошибками не повторяется сразу: у писем отсрочка
+                if not sent:
+                    break
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,58 @@
+import os
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.signals import replica_refreshed
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную SQLite-базу в файлы реплик через backup API. '
+            'Реплика подменяется атомарно, открытые чтения дочитывают '
+            'старый снимок.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output',
+                            help='Записать снимок в этот файл, а не в реплики '
+                                 'из DATABASE_REPLICAS')
+        parser.add_argument('--interval', type=float, default=0,
+                            help='Повторять каждые N секунд, пока не прервут')
+
+    def handle(self, *args, **options):
+        if options['output']:
+            targets = [(None, options['output'])]
+        else:
+            targets = [(alias, settings.DATABASES[alias]['NAME'])
+                       for alias in settings.DATABASE_REPLICAS]
+        if not targets:
+            raise CommandError('DATABASE_REPLICAS пуст, укажите --output')
+        while True:
+            for alias, path in targets:
+                started = time.perf_counter()
+                self.snapshot(path)
+                if alias is not None:
+                    replica_refreshed.send(sender=self.__class__, alias=alias)
+                self.stdout.write(
+                    f'{alias or path}: снимок за '
+                    f'{(time.perf_counter() - started) * 1000:.0f} мс')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def snapshot(self, path):
+        connection = connections['default']
+        if connection.vendor != 'sqlite':
+            raise CommandError('Снимок реплики поддерживается только '
+                               'для SQLite')
+        connection.ensure_connection()
+        partial = f'{path}.{os.getpid()}.part'
+        target = sqlite3.connect(partial)
+        try:
+            # постранично, чтобы не держать блокировку основной базы
+            connection.connection.backup(target, pages=1024)
+        finally:
+            target.close()
+        os.replace(partial, path)
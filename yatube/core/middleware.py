@@ -0,0 +1,206 @@
+import cProfile
+import json
+import logging
+import mimetypes
+import os
+import random
+import re
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import connections
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from . import profiling
+from .routers import STICKY_COOKIE
+from .timing import RequestTimings, current
+
+timing_logger = logging.getLogger('core.timing')
+
+# имя с хэшем содержимого от ManifestStaticFilesStorage: name.0123abcd4567.ext
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.[^/.]+$')
+
+
+class StaticFilesMiddleware:
+    """Отдаёт собранную статику из ``STATIC_ROOT`` без захода во view.
+
+    Файлы с хэшем в имени кэшируются клиентом на ``STATIC_MAX_AGE``
+    как неизменяемые, остальные - на ``STATIC_FALLBACK_MAX_AGE``. Если
+    клиент принимает gzip и рядом лежит ``.gz``-копия, отдаётся она.
+    Ответ - ``FileResponse``, поэтому WSGI-сервер с ``wsgi.file_wrapper``
+    отправляет файл через sendfile, не копируя его в процесс.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        self.root = settings.STATIC_ROOT
+
+    def __call__(self, request):
+        if (self.root and request.method in ('GET', 'HEAD')
+                and request.path_info.startswith(self.prefix)):
+            response = self.serve(request,
+                                  request.path_info[len(self.prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def find(self, name):
+        try:
+            path = safe_join(self.root, name)
+        except SuspiciousFileOperation:
+            return None
+        return path if os.path.isfile(path) else None
+
+    def serve(self, request, name):
+        path = self.find(name)
+        if path is None:
+            return None
+        stat = os.stat(path)
+        if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'),
+                                  stat.st_mtime, stat.st_size):
+            return HttpResponseNotModified()
+        content_type, encoding = mimetypes.guess_type(path)
+        served = path
+        gzipped = path + '.gz'
+        accepts_gzip = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if encoding is None and accepts_gzip and os.path.isfile(gzipped):
+            served, encoding = gzipped, 'gzip'
+        response = FileResponse(open(served, 'rb'))
+        response['Content-Type'] = content_type or 'application/octet-stream'
+        response['Content-Length'] = os.path.getsize(served)
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        if encoding:
+            response['Content-Encoding'] = encoding
+        if os.path.isfile(gzipped):
+            patch_vary_headers(response, ('Accept-Encoding',))
+        if HASHED_NAME_RE.search(name):
+            response['Cache-Control'] = (
+                f'public, max-age={settings.STATIC_MAX_AGE}, immutable')
+        else:
+            response['Cache-Control'] = (
+                f'public, max-age={settings.STATIC_FALLBACK_MAX_AGE}')
+        return response
+
+
+class ReplicaStickinessMiddleware:
+    """После успешного изменяющего запроса ставит cookie, и следующие
+    ``REPLICA_STICKY_SECONDS`` секунд клиент читает с основной базы,
+    пока реплика не догонит его запись."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (settings.DATABASE_REPLICAS
+                and request.method not in ('GET', 'HEAD', 'OPTIONS')
+                and response.status_code < 400):
+            seconds = settings.REPLICA_STICKY_SECONDS
+            response.set_cookie(
+                STICKY_COOKIE, str(time.time() + seconds), max_age=seconds,
+                httponly=True, samesite='Lax')
+        return response
+
+
+class ServerTimingMiddleware:
+    """Меряет SQL, рендеринг шаблонов и общее время запроса.
+
+    Запросы к базе считаются через ``connection.execute_wrapper``,
+    повтор - тот же SQL с теми же параметрами. Итог уходит в заголовок
+    ``Server-Timing`` и строкой JSON в логгер ``core.timing``. На запрос
+    добавляется пара вызовов ``perf_counter`` на каждый SQL и шаблон.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = current.set(timings)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings))
+                response = self.get_response(request)
+        finally:
+            current.reset(token)
+        total = time.perf_counter() - start
+        if settings.SERVER_TIMING_HEADER:
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={timings.db_time * 1000:.1f};'
+                f'desc="{timings.queries} queries"',
+                f'dup;desc="{timings.duplicates} duplicate queries"',
+                f'tpl;dur={timings.render_time * 1000:.1f}',
+                f'app;dur={total * 1000:.1f}',
+            ])
+        if timing_logger.isEnabledFor(logging.INFO):
+            match = request.resolver_match
+            timing_logger.info(json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'view': match.view_name if match else None,
+                'status': response.status_code,
+                'queries': timings.queries,
+                'duplicates': timings.duplicates,
+                'db_ms': round(timings.db_time * 1000, 2),
+                'render_ms': round(timings.render_time * 1000, 2),
+                'total_ms': round(total * 1000, 2),
+            }))
+        return response
+
+
+class ProfilingMiddleware:
+    """Профилирует через cProfile долю запросов или запрос с токеном.
+
+    Случайно выбирается ``PROFILING_SAMPLE_RATE`` запросов; кроме того,
+    профилируется любой запрос с заголовком ``X-Profile-Token``, значение
+    которого выдаёт команда ``profile_token``. Профили пишутся на диск
+    (``core.profiling``) и смотрятся на странице ``admin/profiles/``.
+    """
+
+    header = 'HTTP_X_PROFILE_TOKEN'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def should_profile(self, request):
+        token = request.META.get(self.header)
+        if token:
+            return profiling.check_token(token)
+        rate = settings.PROFILING_SAMPLE_RATE
+        return rate > 0 and random.random() < rate
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            profiler.enable()
+        except ValueError:
+            # в этом потоке уже работает другой профилировщик
+            return self.get_response(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        duration = time.perf_counter() - start
+        match = request.resolver_match
+        profile_id = profiling.save_profile(profiler, {
+            'method': request.method,
+            'path': request.get_full_path(),
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 2),
+            'created': time.time(),
+        })
+        response['X-Profile-Id'] = profile_id
+        return response
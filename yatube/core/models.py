@@ -0,0 +1,20 @@
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxMessage(models.Model):
+    """Письмо, ожидающее отправки командой send_queued_mail."""
+
+    # EmailMessage в JSON, см. core.mail.serialize
+    data = models.TextField()
+    created = models.DateTimeField(auto_now_add=True)
+    # раньше этого времени письмо не отправляется: отсрочка после ошибки
+    send_after = models.DateTimeField(default=timezone.now, db_index=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ('pk',)
+
+    def __str__(self) -> str:
+        return f'Письмо {self.pk}, попыток: {self.attempts}'
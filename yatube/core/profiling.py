@@ -0,0 +1,100 @@
+"""Хранилище профилей cProfile отдельных запросов.
+
+Каждый профиль - пара файлов в ``PROFILING_DIR``: ``<id>.prof`` (формат
+pstats) и ``<id>.json`` с путём, view и длительностью. Файлов не больше
+``PROFILING_MAX_FILES`` профилей: старые удаляются при записи новых.
+"""
+import json
+import os
+import pstats
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core import signing
+
+TOKEN_SALT = 'core.profiling'
+
+
+def make_token():
+    """Подписанное значение заголовка, включающего профилирование."""
+
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign('profile')
+
+
+def check_token(token):
+    try:
+        signing.TimestampSigner(salt=TOKEN_SALT).unsign(
+            token, max_age=settings.PROFILING_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def save_profile(profiler, meta):
+    directory = settings.PROFILING_DIR
+    os.makedirs(directory, exist_ok=True)
+    profile_id = f'{time.time_ns()}-{os.getpid()}'
+    profiler.dump_stats(os.path.join(directory, f'{profile_id}.prof'))
+    with open(os.path.join(directory, f'{profile_id}.json'), 'w') as target:
+        json.dump(dict(meta, id=profile_id), target)
+    rotate(directory, settings.PROFILING_MAX_FILES)
+    return profile_id
+
+
+def rotate(directory, keep):
+    # id начинается со времени в наносекундах: сортировка по имени -
+    # сортировка по возрасту
+    ids = sorted(name[:-len('.json')] for name in os.listdir(directory)
+                 if name.endswith('.json'))
+    for profile_id in ids[:max(len(ids) - keep, 0)]:
+        for extension in ('.json', '.prof'):
+            try:
+                os.remove(os.path.join(directory, profile_id + extension))
+            except FileNotFoundError:
+                pass
+
+
+def load_index():
+    """Метаданные профилей по view, самые долгие запросы первыми."""
+
+    directory = settings.PROFILING_DIR
+    by_view = defaultdict(list)
+    if not os.path.isdir(directory):
+        return {}
+    for name in os.listdir(directory):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as source:
+                meta = json.load(source)
+        except (OSError, ValueError):
+            continue
+        by_view[meta.get('view') or '-'].append(meta)
+    for profiles in by_view.values():
+        profiles.sort(key=lambda meta: meta['duration_ms'], reverse=True)
+    return dict(by_view)
+
+
+def top_functions(profile_ids, sort='cumulative', limit=25):
+    """Сводка по функциям из нескольких профилей сразу."""
+
+    directory = settings.PROFILING_DIR
+    paths = [os.path.join(directory, f'{profile_id}.prof')
+             for profile_id in profile_ids]
+    paths = [path for path in paths if os.path.exists(path)]
+    if not paths:
+        return []
+    stats = pstats.Stats(*paths)
+    rows = []
+    for (filename, line, name), (cc, calls, tottime, cumtime, _) in \
+            stats.stats.items():
+        rows.append({
+            'function': f'{name} ({os.path.basename(filename)}:{line})',
+            'calls': calls,
+            'tottime_ms': round(tottime * 1000, 2),
+            'cumtime_ms': round(cumtime * 1000, 2),
+        })
+    key = 'tottime_ms' if sort == 'tottime' else 'cumtime_ms'
+    rows.sort(key=lambda row: row[key], reverse=True)
+    return rows[:limit]
@@ -0,0 +1,68 @@
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+# cookie со временем, до которого пользователь читает с основной базы
+STICKY_COOKIE = 'primary_until'
+
+_replica_reads = ContextVar('replica_reads', default=False)
+# приложения, чьи модели читаются с реплик; сессии и пользователи
+# всегда читаются с default: их нет в снимке, сделанном до входа
+REPLICA_APPS = {'posts'}
+
+
+class ReplicaRouter:
+    """Отправляет чтения моделей ``REPLICA_APPS`` из ``read_from_replica``
+    на реплики.
+
+    Все записи, миграции и чтения вне помеченных view идут в ``default``.
+    Реплики перечислены в ``DATABASE_REPLICAS``; пустой список отключает
+    маршрутизацию.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (replicas and _replica_reads.get()
+                and model._meta.app_label in REPLICA_APPS):
+            return random.choice(replicas)
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # реплики - копии основной базы, связи между ними допустимы
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # реплика получает схему вместе со снимком основной базы
+        return db not in settings.DATABASE_REPLICAS
+
+
+def is_sticky(request):
+    """Пользователь недавно писал и должен видеть свои изменения."""
+
+    try:
+        until = float(request.COOKIES.get(STICKY_COOKIE, 0))
+    except ValueError:
+        return False
+    return until > time.time()
+
+
+def read_from_replica(view):
+    """Выполняет чтения view на реплике, если клиент не «прилип»
+    к основной базе после своей записи."""
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or is_sticky(request):
+            return view(request, *args, **kwargs)
+        token = _replica_reads.set(True)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+    return wrapper
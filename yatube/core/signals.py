@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .auth import user_cache, user_key
+
+# снимок основной базы скопирован в реплику; аргумент - alias реплики
+replica_refreshed = Signal(providing_args=['alias'])
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Применяет ``SQLITE_PRAGMAS`` к каждому новому соединению SQLite."""
+
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def drop_cached_user(sender, instance, **kwargs):
+    """Сбрасывает пользователя из кэша ``CachedModelBackend``: смена
+    пароля, вход и правка профиля сохраняют модель."""
+
+    user_cache().delete(user_key(instance.pk))
@@ -0,0 +1,46 @@
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+# текстовые форматы, которые имеет смысл сжимать заранее
+COMPRESSIBLE = ('.css', '.js', '.svg', '.ico', '.txt', '.html', '.json',
+                '.map', '.xml')
+
+
+class CompressedManifestStorage(ManifestStaticFilesStorage):
+    """Хранилище статики с хэшем содержимого в имени и ``.gz``-копиями.
+
+    ``collectstatic`` пишет в ``STATIC_ROOT`` файлы вида
+    ``css/bootstrap.min.<hash>.css``, манифест ``staticfiles.json`` и
+    рядом с текстовыми файлами их сжатые варианты ``<имя>.gz``.
+    """
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # статика ещё не собрана (разработка, тесты): ссылка без хэша
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(self.hashed_files.values()) | set(paths)
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE) and self.exists(name):
+                self.compress(name)
+
+    def compress(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as source:
+            content = source.read()
+        # mtime=0 делает архив воспроизводимым между сборками
+        compressed = gzip.compress(content, compresslevel=9, mtime=0)
+        if len(compressed) >= len(content):
+            return
+        with open(path + '.gz', 'wb') as target:
+            target.write(compressed)
+        os.utime(path + '.gz', (os.path.getatime(path),
+                                os.path.getmtime(path)))
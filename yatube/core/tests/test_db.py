@@ -0,0 +1,29 @@
+from django.db import connection
+from django.test import TestCase
+
+from core.db import serialized_write
+from posts.models import Post, User
+
+
+class SqliteSettingsTest(TestCase):
+    def test_pragmas_are_applied(self):
+        """Новое соединение получает настройки из SQLITE_PRAGMAS."""
+
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -64 * 1024)
+            cursor.execute('PRAGMA synchronous')
+            # 1 - NORMAL
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_serialized_write_rolls_back_on_error(self):
+        """Блок записи - одна транзакция."""
+
+        user = User.objects.create_user(username='testuser')
+        with self.assertRaises(ValueError):
+            with serialized_write():
+                Post.objects.create(author=user, text='Запись')
+                raise ValueError
+        self.assertFalse(Post.objects.exists())
@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.loaders import minify
+from posts.models import Post, User
+
+PRODUCTION_TEMPLATES = [dict(
+    settings.TEMPLATES[0],
+    OPTIONS=dict(settings.TEMPLATES[0]['OPTIONS'],
+                 loaders=settings.TEMPLATE_LOADERS['production']),
+)]
+
+
+class MinifyTest(TestCase):
+    def test_minify(self):
+        """Комментарии и отступы убираются, значимые пробелы остаются."""
+
+        source = (
+            '<!-- шапка -->\n<div>\n    <p>a  b</p>\n'
+            '    <!-- page-cache:header -->\n'
+            '<pre>\n  код\n</pre>\n</div>'
+        )
+        self.assertEqual(
+            minify(source),
+            '\n<div>\n<p>a  b</p>\n<!-- page-cache:header -->\n'
+            '<pre>\n  код\n</pre>\n</div>'
+        )
+
+
+@override_settings(TEMPLATES=PRODUCTION_TEMPLATES)
+class ProductionTemplatesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testuser')
+        Post.objects.create(author=cls.user, text='Первая запись')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_pages_are_minified_and_cached(self):
+        """Сжатые страницы без комментариев по-прежнему кэшируются."""
+
+        url = reverse('posts:index')
+        first = self.client.get(url)
+        self.assertNotContains(first, '<!--')
+        self.assertContains(first, 'Первая запись')
+        second = self.client.get(url)
+        self.assertTemplateNotUsed(second, 'posts/index.html')
+        self.assertEqual(first.content, second.content)
@@ -0,0 +1,102 @@
+from email.mime.text import MIMEText
+from io import StringIO
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.mail import deserialize, serialize
+from core.models import OutboxMessage
+from posts.models import User
+
+
+class CountingBackend(EmailBackend):
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return True
+
+
+class FailingBackend(EmailBackend):
+    def send_messages(self, messages):
+        raise ConnectionError('сервер недоступен')
+
+
+@override_settings(
+    EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+    OUTBOX_EMAIL_BACKEND='core.tests.test_mail.CountingBackend')
+class QueuedMailTest(TestCase):
+    def setUp(self):
+        User.objects.create_user(username='testuser',
+                                 email='test@example.com',
+                                 password='password')
+        CountingBackend.opened = 0
+
+    def send_queued(self):
+        call_command('send_queued_mail', stdout=StringIO())
+
+    def test_password_reset_is_queued(self):
+        """Запрос сброса пароля не отправляет письмо, а ставит в очередь."""
+
+        self.client.post(reverse('password_reset'),
+                         {'email': 'test@example.com'})
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+        self.send_queued()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['test@example.com'])
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_batch_reuses_connection(self):
+        mail.send_mass_mail([
+            ('Тема', 'Текст', 'from@example.com', [f'to{i}@example.com'])
+            for i in range(5)])
+        with override_settings(OUTBOX_BATCH_SIZE=3):
+            self.send_queued()
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(CountingBackend.opened, 2)
+
+    @override_settings(OUTBOX_EMAIL_BACKEND=(
+        'core.tests.test_mail.FailingBackend'))
+    def test_failed_message_is_retried_later(self):
+        mail.send_mail('Тема', 'Текст', 'from@example.com',
+                       ['to@example.com'])
+        self.send_queued()
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.attempts, 1)
+        self.assertIn('сервер недоступен', message.last_error)
+        # отсрочка ещё не прошла: повторной попытки нет
+        self.send_queued()
+        message.refresh_from_db()
+        self.assertEqual(message.attempts, 1)
+
+    def test_serialize_round_trip(self):
+        message = mail.EmailMultiAlternatives(
+            'Тема', 'Текст', 'from@example.com', ['to@example.com'],
+            cc=['cc@example.com'], headers={'X-Tag': 'test'})
+        message.attach_alternative('<p>Текст</p>', 'text/html')
+        message.attach('file.txt', 'содержимое', 'text/plain')
+        restored = deserialize(serialize(message))
+        self.assertEqual(restored.message().as_bytes().count(b'X-Tag'), 1)
+        self.assertEqual(restored.alternatives, message.alternatives)
+        self.assertEqual(restored.attachments, message.attachments)
+        self.assertEqual(restored.recipients(), message.recipients())
+
+    def test_mime_attachment_round_trip(self):
+        """Готовая MIME-часть доходит из очереди без изменений."""
+
+        part = MIMEText('Содержимое части', 'plain', 'utf-8')
+        part.add_header('Content-Disposition', 'attachment',
+                        filename='part.txt')
+        message = mail.EmailMessage(
+            'Тема', 'Текст', 'from@example.com', ['to@example.com'])
+        message.attach(part)
+        message.send()
+        self.send_queued()
+        sent, = mail.outbox
+        restored, = sent.attachments
+        self.assertEqual(restored.as_bytes(), part.as_bytes())
+        self.assertIn(b'filename="part.txt"', sent.message().as_bytes())
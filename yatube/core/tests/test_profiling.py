@@ -0,0 +1,63 @@
+import os
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.profiling import make_token
+from posts.models import Post, User
+
+PROFILING_DIR = tempfile.mkdtemp()
+
+
+@override_settings(PROFILING_DIR=PROFILING_DIR, PROFILING_MAX_FILES=2,
+                   PROFILING_SAMPLE_RATE=0)
+class ProfilingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testuser')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.post = Post.objects.create(author=cls.user, text='Запись')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(PROFILING_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_only_signed_requests_are_profiled(self):
+        """Профиль пишется по подписанному токену, старые удаляются."""
+
+        url = reverse('posts:profile', kwargs={'username': 'testuser'})
+        self.assertNotIn('X-Profile-Id', self.client.get(url))
+        self.assertNotIn('X-Profile-Id', self.client.get(
+            url, HTTP_X_PROFILE_TOKEN='profile:forged'))
+        for _ in range(3):
+            response = self.client.get(
+                url, HTTP_X_PROFILE_TOKEN=make_token())
+            self.assertIn('X-Profile-Id', response)
+        self.assertEqual(
+            sorted(os.listdir(PROFILING_DIR))[-2:],
+            [response['X-Profile-Id'] + '.json',
+             response['X-Profile-Id'] + '.prof'])
+        self.assertEqual(len(os.listdir(PROFILING_DIR)), 4)
+
+    def test_profiles_page_is_staff_only(self):
+        """Страница профилей доступна только персоналу."""
+
+        self.client.get(reverse('posts:index'),
+                        HTTP_X_PROFILE_TOKEN=make_token())
+        url = reverse('profiles')
+        client = Client()
+        client.force_login(self.user)
+        self.assertEqual(client.get(url).status_code, 302)
+
+        client.force_login(self.staff)
+        response = client.get(url, {'view': 'posts:index'})
+        self.assertContains(response, 'posts:index')
+        self.assertTrue(response.context['functions'])
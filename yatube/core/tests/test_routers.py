@@ -0,0 +1,133 @@
+import io
+import os
+import sqlite3
+import tempfile
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connections, router
+from django.http import HttpResponse
+from django.test import (
+    Client, RequestFactory, TestCase, TransactionTestCase, override_settings,
+)
+from django.urls import reverse
+
+from core.routers import STICKY_COOKIE, read_from_replica
+from posts.models import Post, User
+
+
+@read_from_replica
+def read_alias(request):
+    return HttpResponse(router.db_for_read(Post))
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTest(TestCase):
+    def test_feed_reads_go_to_replica(self):
+        """Чтения помеченных view идут на реплику, запись - на default."""
+
+        factory = RequestFactory()
+        self.assertEqual(read_alias(factory.get('/')).content, b'replica')
+        self.assertEqual(read_alias(factory.post('/')).content, b'default')
+        self.assertEqual(router.db_for_read(Post), 'default')
+        self.assertEqual(router.db_for_write(Post), 'default')
+        self.assertFalse(router.allow_migrate('replica', 'posts'))
+
+        with self.settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(read_alias(factory.get('/')).content, b'default')
+
+    def test_sessions_and_users_read_from_primary(self):
+        """Сессии и пользователи читаются с default и внутри view реплики."""
+
+        @read_from_replica
+        def read_aliases(request):
+            return HttpResponse(' '.join(
+                router.db_for_read(model) for model in (Post, Session, User)))
+
+        response = read_aliases(RequestFactory().get('/'))
+        self.assertEqual(response.content, b'replica default default')
+
+    def test_author_sticks_to_primary_after_write(self):
+        """После записи автор какое-то время читает с default."""
+
+        user = User.objects.create_user(username='testuser')
+        client = Client()
+        client.force_login(user)
+        response = client.post(
+            reverse('posts:post_create'), data={'text': 'Новая запись'})
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(STICKY_COOKIE, response.cookies)
+
+        request = RequestFactory().get('/')
+        request.COOKIES[STICKY_COOKIE] = response.cookies[STICKY_COOKIE].value
+        self.assertEqual(read_alias(request).content, b'default')
+        request.COOKIES[STICKY_COOKIE] = str(time.time() - 1)
+        self.assertEqual(read_alias(request).content, b'replica')
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaViewsTest(TransactionTestCase):
+    # реплика в тестах - зеркало default, и видит только закоммиченное
+    databases = {'default', 'replica'}
+
+    def test_logged_in_feed_with_replicas(self):
+        """Вход не теряется на странице, читающей с реплики."""
+
+        user = User.objects.create_user(username='testuser')
+        client = Client()
+        client.force_login(user)
+        # сессии и пользователя нет в кэше, они читаются из базы
+        caches['sessions'].clear()
+        replica_sql = []
+
+        def record(execute, sql, params, many, context):
+            replica_sql.append(sql)
+            return execute(sql, params, many, context)
+
+        with connections['replica'].execute_wrapper(record):
+            response = client.get(reverse('posts:index'))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.context['user'], user)
+            response = client.get(reverse('posts:follow_index'))
+            self.assertEqual(response.status_code, 200)
+        self.assertTrue(replica_sql)
+        for sql in replica_sql:
+            self.assertNotIn('FROM "django_session"', sql)
+            self.assertNotIn('FROM "auth_user"', sql)
+
+    def test_replica_pages_expire(self):
+        """Страница, собранная по данным реплики, живёт ограниченное время:
+        сигнал о новом снимке не доходит до других процессов."""
+
+        user = User.objects.create_user(username='testuser')
+        Post.objects.create(author=user, text='Запись')
+        url = reverse('posts:index')
+        cache.clear()
+        self.client.get(url)
+        self.assertTemplateNotUsed(self.client.get(url), 'posts/index.html')
+
+        cache.clear()
+        with self.settings(REPLICA_PAGE_CACHE_TIMEOUT=0):
+            self.client.get(url)
+            response = self.client.get(url)
+        self.assertTemplateUsed(response, 'posts/index.html')
+
+
+class SnapshotReplicaTest(TransactionTestCase):
+    def test_snapshot_copies_primary(self):
+        """Снимок содержит данные основной базы."""
+
+        user = User.objects.create_user(username='testuser')
+        Post.objects.create(author=user, text='Запись')
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'replica.sqlite3')
+            call_command('snapshot_replica', output=path, stdout=io.StringIO())
+            replica = sqlite3.connect(path)
+            try:
+                count, = replica.execute(
+                    'SELECT COUNT(*) FROM posts_post').fetchone()
+            finally:
+                replica.close()
+        self.assertEqual(count, 1)
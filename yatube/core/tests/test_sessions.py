@@ -0,0 +1,59 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import User
+
+
+class CachedSessionTest(TestCase):
+    def setUp(self):
+        caches['sessions'].clear()
+        self.user = User.objects.create_user(
+            username='testuser', password='old-password')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_warm_request_skips_session_and_user(self):
+        """Повторный запрос не читает ни django_session, ни auth_user."""
+
+        self.client.get(reverse('posts:index'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.context['user'], self.user)
+        tables = [query['sql'] for query in queries
+                  if 'django_session' in query['sql']
+                  or 'auth_user' in query['sql']]
+        self.assertEqual(tables, [])
+
+    def test_password_change_drops_cached_user(self):
+        """После смены пароля старая сессия больше не авторизует."""
+
+        self.client.get(reverse('posts:index'))
+        self.user.set_password('new-password')
+        self.user.save()
+        response = self.client.get(reverse('posts:post_create'))
+        self.assertRedirects(
+            response,
+            reverse('users:login') + '?next=' + reverse('posts:post_create'))
+
+
+class CleanupSessionsTest(TestCase):
+    def test_only_expired_sessions_are_deleted(self):
+        now = timezone.now()
+        for i in range(5):
+            Session.objects.create(session_key=f'old{i}', session_data='',
+                                   expire_date=now - timedelta(days=1))
+        Session.objects.create(session_key='fresh', session_data='',
+                               expire_date=now + timedelta(days=1))
+        call_command('cleanup_sessions', chunk_size=2, pause=0,
+                     stdout=StringIO())
+        self.assertEqual(
+            list(Session.objects.values_list('pk', flat=True)), ['fresh'])
@@ -0,0 +1,66 @@
+import gzip
+import shutil
+import tempfile
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import TestCase, override_settings
+
+STATIC_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(STATIC_ROOT=STATIC_ROOT)
+class StaticPipelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_hashed_names_and_gzip_copies(self):
+        """Сборка пишет файлы с хэшем и сжатые копии текстовых файлов."""
+
+        url = static('css/bootstrap.min.css')
+        self.assertRegex(
+            url, r'^/static/css/bootstrap\.min\.[0-9a-f]{12}\.css$')
+        name = staticfiles_storage.stored_name('css/bootstrap.min.css')
+        self.assertTrue(staticfiles_storage.exists(name + '.gz'))
+        self.assertFalse(staticfiles_storage.exists(
+            staticfiles_storage.stored_name('img/logo.png') + '.gz'))
+
+    def test_hashed_file_is_served_with_far_future_cache(self):
+        """Middleware отдаёт сжатую копию с долгим Cache-Control."""
+
+        url = static('css/bootstrap.min.css')
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        body = gzip.decompress(b''.join(response.streaming_content))
+        with staticfiles_storage.open('css/bootstrap.min.css') as original:
+            self.assertEqual(body, original.read())
+
+        plain = self.client.get(url)
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(
+            int(plain['Content-Length']),
+            staticfiles_storage.size(
+                staticfiles_storage.stored_name('css/bootstrap.min.css')))
+
+    def test_unhashed_and_missing_files(self):
+        """Файл без хэша кэшируется коротко, чужие пути не отдаются."""
+
+        response = self.client.get('/static/img/logo.png')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('immutable', response['Cache-Control'])
+        self.assertEqual(
+            self.client.get('/static/../manage.py').status_code, 404)
+        self.assertEqual(
+            self.client.get('/static/css/missing.css').status_code, 404)
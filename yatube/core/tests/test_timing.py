@@ -0,0 +1,35 @@
+import json
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Post, User
+
+
+class ServerTimingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testuser')
+        cls.post = Post.objects.create(author=cls.user, text='Запись')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_header_and_log_line(self):
+        """Ответ несёт Server-Timing, в лог уходит строка JSON."""
+
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        with self.assertLogs('core.timing', 'INFO') as logs:
+            response = self.client.get(url)
+        header = response['Server-Timing']
+        for metric in ('db;dur=', 'dup;desc=', 'tpl;dur=', 'app;dur='):
+            self.assertIn(metric, header)
+
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record['view'], 'posts:post_detail')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['queries'], 0)
+        self.assertGreater(record['render_ms'], 0)
+        self.assertIn(f'desc="{record["queries"]} queries"', header)
@@ -0,0 +1,69 @@
+"""Счётчики времени запроса: SQL и рендеринг шаблонов.
+
+``RequestTimings`` собирает статистику одного запроса; текущий сборщик
+лежит в contextvar, поэтому до него дотягиваются и обёртка курсора,
+и бэкенд шаблонов, не получая request.
+"""
+import time
+from contextvars import ContextVar
+
+from django.template.backends.django import DjangoTemplates, Template
+
+current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.queries = 0
+        self.duplicates = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self._seen = set()
+        self._render_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обёртка ``connection.execute_wrapper``: время и повторы SQL."""
+
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+            key = hash((sql, repr(params)))
+            if key in self._seen:
+                self.duplicates += 1
+            else:
+                self._seen.add(key)
+
+    def render(self, template, context, request):
+        # вложенные рендеры (карточки внутри страницы) уже входят во
+        # время внешнего и не складываются повторно
+        self._render_depth += 1
+        start = time.perf_counter()
+        try:
+            return template.render(context, request)
+        finally:
+            self._render_depth -= 1
+            if not self._render_depth:
+                self.render_time += time.perf_counter() - start
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        timings = current.get()
+        if timings is None:
+            return super().render(context, request)
+        return timings.render(super(), context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Бэкенд Django-шаблонов, считающий время рендеринга запроса."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(
+            self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
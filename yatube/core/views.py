@@ -0,0 +1,37 @@
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.shortcuts import render
+
+from . import profiling
+
+# сколько самых долгих профилей view показывать и сводить вместе
+SLOWEST_LIMIT = 20
+
+
+@staff_member_required
+def profiles(request):
+    """Самые долгие профилированные запросы по view и сводка функций."""
+
+    index = profiling.load_index()
+    views = sorted(
+        ({
+            'name': name,
+            'count': len(metas),
+            'max_ms': metas[0]['duration_ms'],
+            'median_ms': metas[len(metas) // 2]['duration_ms'],
+        } for name, metas in index.items()),
+        key=lambda row: row['max_ms'], reverse=True)
+    selected = request.GET.get('view')
+    sort = request.GET.get('sort', 'cumulative')
+    slowest = index.get(selected, [])[:SLOWEST_LIMIT]
+    functions = profiling.top_functions(
+        [meta['id'] for meta in slowest], sort=sort)
+    return render(request, 'core/profiles.html', {
+        **admin.site.each_context(request),
+        'title': 'Профили запросов',
+        'views': views,
+        'selected': selected,
+        'sort': sort,
+        'slowest': slowest,
+        'functions': functions,
+    })
@@ -1,14 +1,110 @@
 from django.contrib import admin
-from .models import Post, Group
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models.expressions import RawSQL
+from django.utils.functional import cached_property
+
+from . import search
+from .cache import scope_versions
+from .models import Post, PostCounter, Group
+
+# до скольких строк точно считается отфильтрованный список постов
+ADMIN_COUNT_LIMIT = 10000
+
+
+def group_labels():
+    """Подписи всех групп по id; сбрасываются вместе с версией groups."""
+
+    version, = scope_versions(['groups'])
+    key = f'admin-group-labels:{version}'
+    labels = cache.get(key)
+    if labels is None:
+        labels = {
+            str(pk): title
+            for pk, title in Group.objects.values_list('pk', 'title')
+        }
+        cache.set(key, labels, timeout=None)
+    return labels
+
+
+class CachedAutocompleteSelect(AutocompleteSelect):
+    """Автокомплит группы, который берёт подпись выбранной группы из
+    общего кэша, а не отдельным запросом на каждую строку списка."""
+
+    def __init__(self, rel, admin_site, labels, **kwargs):
+        super().__init__(rel, admin_site, **kwargs)
+        # функция не копируется в deepcopy виджета для каждой строки
+        self.labels = labels
+
+    def optgroups(self, name, value, attr=None):
+        default = (None, [], 0)
+        selected_choices = {
+            str(v) for v in value
+            if str(v) not in self.choices.field.empty_values
+        }
+        if not self.is_required:
+            default[1].append(self.create_option(name, '', '', False, 0))
+        labels = self.labels()
+        for option_value in selected_choices:
+            if option_value in labels:
+                default[1].append(self.create_option(
+                    name, option_value, labels[option_value],
+                    selected_choices, len(default[1])
+                ))
+        return [default]
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator списка постов без COUNT(*) по всей таблице.
+
+    Без фильтров число постов берётся из счётчика, с фильтрами
+    считается не дальше ``ADMIN_COUNT_LIMIT`` строк.
+    """
+
+    @cached_property
+    def count(self):
+        if not self.object_list.query.where:
+            return PostCounter.get_value(PostCounter.TOTAL)
+        return self.object_list.order_by()[:ADMIN_COUNT_LIMIT].count()
 
 
 class PostAdmin(admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group',)
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    # навигацию строит post_date_hierarchy из шаблона
+    # admin/posts/post/change_list.html: запросы по диапазонам индекса
+    date_hierarchy = 'pub_date'
     empty_value_display = '-пусто-'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'group':
+            labels = group_labels()
+            kwargs['widget'] = CachedAutocompleteSelect(
+                db_field.remote_field, self.admin_site,
+                labels=lambda: labels, using=kwargs.get('using'))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_search_results(self, request, queryset, search_term):
+        """Ищет по индексу FTS5 вместо LIKE '%...%' по всей таблице."""
+
+        match = search.match_expression(search_term)
+        if not search.is_available() or match is None:
+            return super().get_search_results(
+                request, queryset, search_term)
+        return queryset.filter(
+            pk__in=RawSQL(*search.matching_ids_sql(match))), False
+
+
+class GroupAdmin(admin.ModelAdmin):
+    # поиск нужен автокомплиту группы в списке постов
+    search_fields = ('title', 'slug')
 
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
+admin.site.register(Group, GroupAdmin)
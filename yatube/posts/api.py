@@ -0,0 +1,101 @@
+import hashlib
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.views.decorators.http import require_safe
+
+from .models import Group, Post, TimelineEntry, User
+from .utils import FeedPaginator, TimelinePaginator
+
+# только поля, которые нужны клиенту
+API_FIELDS = ('id', 'text', 'pub_date', 'updated', 'author_id', 'group_id',
+              'author__username', 'group__slug')
+JSON_PARAMS = {'separators': (',', ':'), 'ensure_ascii': False}
+
+
+def api_posts():
+    return Post.objects.select_related('author', 'group').only(*API_FIELDS)
+
+
+def post_etag(posts, *extra):
+    """Сильный ETag окна постов: id, время правки, автор и группа
+    каждого поста плюс признаки соседних страниц."""
+
+    digest = hashlib.sha1()
+    for post in posts:
+        digest.update(
+            f'{post.pk}:{post.updated.timestamp()}:{post.author.username}:'
+            f'{post.group.slug if post.group_id else ""};'.encode())
+    digest.update(repr(extra).encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def serialize_post(post):
+    return {
+        'id': post.pk,
+        'text': post.text,
+        'author': post.author.username,
+        'group': post.group.slug if post.group_id else None,
+        'pub_date': post.pub_date.isoformat(),
+    }
+
+
+def feed_response(request, paginator):
+    """Страница ленты в JSON или 304, если окно не изменилось."""
+
+    page = paginator.get_page(
+        request.GET.get('page'), cursor=request.GET.get('cursor'))
+    posts = page.object_list
+    etag = post_etag(posts, page.has_next(), page.has_previous())
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+    response = JsonResponse({
+        'results': [serialize_post(post) for post in posts],
+        'next': page.next_page_query or None,
+        'previous': page.previous_page_query or None,
+    }, json_dumps_params=JSON_PARAMS)
+    response['ETag'] = etag
+    return response
+
+
+@require_safe
+def index(request):
+    return feed_response(request, TimelinePaginator(
+        TimelineEntry.objects.filter(feed_key=TimelineEntry.ALL),
+        settings.COUNT_INDEX_POSTS,
+        posts=api_posts()
+    ))
+
+
+@require_safe
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return feed_response(request, TimelinePaginator(
+        TimelineEntry.objects.filter(
+            feed_key=TimelineEntry.group_key(group.pk)),
+        settings.COUNT_INDEX_POSTS,
+        posts=api_posts()
+    ))
+
+
+@require_safe
+def profile(request, username):
+    author = get_object_or_404(User, username=username)
+    return feed_response(request, FeedPaginator(
+        api_posts().filter(author=author), settings.COUNT_INDEX_POSTS))
+
+
+@require_safe
+def post_detail(request, post_id):
+    post = get_object_or_404(api_posts(), pk=post_id)
+    etag = post_etag([post])
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+    response = JsonResponse(serialize_post(post),
+                            json_dumps_params=JSON_PARAMS)
+    response['ETag'] = etag
+    return response
@@ -0,0 +1,90 @@
+from collections import Counter, defaultdict
+from itertools import chain
+
+from django.db import transaction
+
+from . import cache as page_cache
+from . import follow, search
+from .models import GroupStats, Post, PostCounter, TimelineEntry
+
+
+def fill_ids(posts):
+    """Проставляет id постам после bulk_create.
+
+    SQLite не возвращает id из bulk_create; до конца транзакции других
+    писателей нет, поэтому последние строки таблицы - наши.
+    """
+    if posts[0].pk is not None:
+        return
+    ids = Post.objects.order_by('-pk').values_list(
+        'pk', flat=True)[:len(posts)]
+    for post, pk in zip(posts, reversed(list(ids))):
+        post.pk = pk
+
+
+def restore_pub_dates(posts, pub_dates):
+    """Возвращает вставленным постам исходные даты.
+
+    ``auto_now_add`` подставляет текущее время при любой вставке, а при
+    переносе постов из других систем нужна исходная дата, поэтому она
+    записывается отдельным UPDATE после вставки.
+    """
+    changed = []
+    for post, pub_date in zip(posts, pub_dates):
+        if pub_date is not None and pub_date != post.pub_date:
+            post.pub_date = pub_date
+            changed.append(post)
+    if changed:
+        Post.objects.bulk_update(changed, ['pub_date'])
+
+
+def count_posts(posts):
+    counts = Counter()
+    for post in posts:
+        counts[PostCounter.TOTAL] += 1
+        counts[PostCounter.author_key(post.author_id)] += 1
+        if post.group_id:
+            counts[PostCounter.group_key(post.group_id)] += 1
+    for key, delta in counts.items():
+        PostCounter.change(key, delta)
+
+
+def record_group_activity(posts):
+    group_dates = defaultdict(list)
+    for post in posts:
+        if post.group_id:
+            group_dates[post.group_id].append(post.pub_date)
+    for group_id, dates in group_dates.items():
+        GroupStats.record(group_id, dates, 1)
+
+
+def fill_timelines(posts):
+    TimelineEntry.objects.bulk_create(chain.from_iterable(
+        TimelineEntry.entries_for(post) for post in posts))
+    TimelineEntry.objects.bulk_create(follow.fan_out_entries(posts))
+
+
+def bulk_create_posts(posts, keep_dates=False):
+    """Вставляет посты пачкой и ведёт то, что для одиночных постов
+    обновляют сигналы: счётчики, ленты, поисковый индекс и кэш страниц.
+    """
+    posts = list(posts)
+    if not posts:
+        return posts
+    pub_dates = [post.pub_date for post in posts]
+    with transaction.atomic():
+        Post.objects.bulk_create(posts)
+        fill_ids(posts)
+        if keep_dates:
+            restore_pub_dates(posts, pub_dates)
+        count_posts(posts)
+        record_group_activity(posts)
+        fill_timelines(posts)
+        if search.is_available():
+            search.index_new_posts(posts)
+
+    page_cache.invalidate(*page_cache.post_page_scopes(
+        {post.author_id for post in posts},
+        {post.group_id for post in posts} - {None}
+    ))
+    return posts
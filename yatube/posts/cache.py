@@ -0,0 +1,136 @@
+import hashlib
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+
+from .models import Group, User
+
+# метка, на место которой подставляется шапка конкретного пользователя
+HEADER_PLACEHOLDER = '<!-- page-cache:header -->'
+# метка кнопки подписки в профиле: она тоже своя у каждого пользователя
+FOLLOW_PLACEHOLDER = '<!-- page-cache:follow -->'
+# область всех страниц, собранных по данным реплик: сбрасывается
+# с каждым новым снимком, чтобы отставшая страница не жила дольше него.
+# Снимок делает отдельный процесс, поэтому такие страницы ещё и живут
+# не дольше REPLICA_PAGE_CACHE_TIMEOUT
+REPLICA_SCOPE = 'replica'
+
+
+def page_cache():
+    return caches[settings.PAGE_CACHE_ALIAS]
+
+
+def author_scope(author_id):
+    """Область карточек постов автора: сбрасывается правкой его имени."""
+
+    return f'author:{author_id}'
+
+
+def version_key(scope):
+    return f'page-version:{scope}'
+
+
+def invalidate(*scopes):
+    """Сбрасывает все закэшированные страницы перечисленных областей.
+
+    Версия области - случайная строка, поэтому вытесненная из кэша
+    версия не может совпасть со старой и вернуть устаревшую страницу.
+    """
+    page_cache().set_many(
+        {version_key(scope): uuid.uuid4().hex for scope in scopes},
+        timeout=None
+    )
+
+
+def post_page_scopes(author_ids, group_ids):
+    """Области кэша страниц, в которых показываются посты этих авторов
+    и групп."""
+
+    scopes = ['index']
+    slugs = Group.objects.filter(pk__in=group_ids).values_list(
+        'slug', flat=True)
+    scopes.extend(f'group:{slug}' for slug in slugs)
+    usernames = User.objects.filter(pk__in=author_ids).values_list(
+        'username', flat=True)
+    scopes.extend(f'profile:{username}' for username in usernames)
+    return scopes
+
+
+def scope_versions(scopes):
+    cache = page_cache()
+    keys = [version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            version = uuid.uuid4().hex
+            if not cache.add(key, version, timeout=None):
+                version = cache.get(key, version)
+            versions[key] = version
+    return [versions[key] for key in keys]
+
+
+def page_key(view_name, scopes, request):
+    query = '&'.join(
+        f'{name}={request.GET.get(name, "")}' for name in ('page', 'cursor'))
+    versions = ':'.join(scope_versions(scopes))
+    digest = hashlib.md5(f'{versions}?{query}'.encode()).hexdigest()
+    return f'page:{view_name}:{scopes[0]}:{digest}'
+
+
+def render_header(request):
+    return render_to_string('includes/header.html', request=request)
+
+
+def personalize(body, request, fragments, kwargs):
+    body = body.replace(HEADER_PLACEHOLDER, render_header(request))
+    for placeholder, render in fragments.items():
+        body = body.replace(placeholder, render(request, **kwargs))
+    return body
+
+
+def cache_feed_page(scope_func, fragments=None):
+    """Кэширует страницу ленты до изменения её постов или групп.
+
+    ``scope_func`` по аргументам view возвращает области, от которых
+    зависит страница (``index``, ``group:<slug>``, ``profile:<username>``,
+    ``groups``); записи области сбрасываются сигналами через
+    ``invalidate``. Шапка с данными
+    пользователя в кэш не попадает и дорисовывается на каждый запрос,
+    поэтому одну запись делят гости и авторизованные пользователи.
+    Так же дорисовываются ``fragments``: метка в теле страницы ->
+    функция (request, аргументы view), возвращающая HTML.
+    """
+    fragments = fragments or {}
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            cache = page_cache()
+            scopes = tuple(scope_func(**kwargs))
+            timeout = None
+            if settings.DATABASE_REPLICAS:
+                scopes += (REPLICA_SCOPE,)
+                timeout = settings.REPLICA_PAGE_CACHE_TIMEOUT
+            key = page_key(view.__name__, scopes, request)
+            body = cache.get(key)
+            if body is not None:
+                return HttpResponse(
+                    personalize(body, request, fragments, kwargs))
+            request.page_cache_fill = True
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200 or response.streaming:
+                return response
+            body = response.content.decode(response.charset)
+            if HEADER_PLACEHOLDER not in body:
+                return response
+            cache.set(key, body, timeout=timeout)
+            response.content = personalize(body, request, fragments, kwargs)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, register
+
+
+@register()
+def check_page_cache(app_configs, **kwargs):
+    """Кэш страниц сбрасывается сигналами в процессе, который писал в
+    базу, поэтому он должен быть общим для всех процессов сервера."""
+
+    if isinstance(caches[settings.PAGE_CACHE_ALIAS], LocMemCache):
+        return [Error(
+            'PAGE_CACHE_ALIAS указывает на LocMemCache: другие процессы '
+            'не увидят сброса и будут отдавать устаревшие страницы.',
+            hint='Используйте общий кэш: файловый, memcached или redis.',
+            id='posts.E001',
+        )]
+    return []
@@ -0,0 +1,86 @@
+import hashlib
+
+from django.views.decorators.http import condition
+
+from .models import Group, Post, PostCounter, User
+
+# параметры запроса, от которых зависит содержимое страницы ленты
+PAGE_PARAMS = ('page', 'cursor')
+
+
+def scope_state(request, keys, *extra):
+    """Время последней правки и ETag страницы по счётчикам её областей.
+
+    Все счётчики читаются одним запросом по первичному ключу. Шапка
+    страницы зависит от пользователя, поэтому в ETag входит его id,
+    а время входа сдвигает Last-Modified.
+    """
+    counters = sorted(PostCounter.objects.filter(key__in=keys).values_list(
+        'key', 'value', 'modified'))
+    stamps = [modified for key, value, modified in counters]
+    stamps.extend(stamp for stamp in extra if stamp is not None)
+    user = request.user
+    if user.is_authenticated and user.last_login:
+        stamps.append(user.last_login)
+    digest = hashlib.sha1()
+    for key, value, modified in counters:
+        digest.update(f'{key}={value}@{modified.timestamp()};'.encode())
+    for stamp in extra:
+        digest.update(f'{stamp and stamp.timestamp()};'.encode())
+    digest.update(f'user={user.pk}'.encode())
+    for name in PAGE_PARAMS:
+        digest.update(f'&{name}={request.GET.get(name, "")}'.encode())
+    return f'"{digest.hexdigest()}"', max(stamps, default=None)
+
+
+def index_state(request):
+    return scope_state(request, [PostCounter.TOTAL, PostCounter.GROUPS])
+
+
+def group_state(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True).first()
+    if group_id is None:
+        return None, None
+    return scope_state(request, [PostCounter.group_key(group_id)])
+
+
+def profile_state(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True).first()
+    if author_id is None:
+        return None, None
+    keys = [PostCounter.author_key(author_id), PostCounter.GROUPS]
+    if request.user.is_authenticated:
+        # кнопка подписки меняется с подписками пользователя
+        keys.append(PostCounter.follows_key(request.user.pk))
+    return scope_state(request, keys)
+
+
+def post_state(request, post_id):
+    post = Post.objects.filter(pk=post_id).values_list(
+        'updated', 'author_id').first()
+    if post is None:
+        return None, None
+    updated, author_id = post
+    return scope_state(request, [
+        PostCounter.author_key(author_id), PostCounter.GROUPS], updated)
+
+
+def conditional_page(state_func):
+    """Отвечает 304 на повторный запрос, пока области страницы не менялись.
+
+    ``state_func`` по аргументам view возвращает пару (ETag,
+    Last-Modified); проверка идёт до рендеринга шаблонов и до кэша
+    страниц. Пара считается один раз и запоминается на запросе.
+    """
+    def state(request, **kwargs):
+        if not hasattr(request, '_posts_condition'):
+            request._posts_condition = state_func(request, **kwargs)
+        return request._posts_condition
+
+    return condition(
+        etag_func=lambda request, **kwargs: state(request, **kwargs)[0],
+        last_modified_func=(
+            lambda request, **kwargs: state(request, **kwargs)[1]),
+    )
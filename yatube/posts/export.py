@@ -0,0 +1,65 @@
+import csv
+import json
+
+from django.http import StreamingHttpResponse
+
+EXPORT_FIELDS = ('id', 'text', 'author', 'group', 'pub_date')
+
+
+def iter_posts(queryset, chunk_size=1000):
+    """Посты по возрастанию id пачками по ключу, без OFFSET и без
+    загрузки всей выборки в память."""
+
+    queryset = queryset.select_related('author', 'group').order_by('pk')
+    last_pk = 0
+    while True:
+        chunk = list(queryset.filter(pk__gt=last_pk)[:chunk_size])
+        if not chunk:
+            return
+        yield from chunk
+        last_pk = chunk[-1].pk
+
+
+def post_record(post):
+    """Запись поста в формате, который понимает import_posts."""
+
+    return {
+        'id': post.pk,
+        'text': post.text,
+        'author': post.author.username,
+        'group': post.group.slug if post.group_id else '',
+        'pub_date': post.pub_date.isoformat(),
+    }
+
+
+def jsonl_lines(posts):
+    for post in posts:
+        yield json.dumps(post_record(post), ensure_ascii=False) + '\n'
+
+
+class _Line:
+    """Буфер csv.writer, который отдаёт записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(posts):
+    writer = csv.DictWriter(_Line(), fieldnames=EXPORT_FIELDS)
+    yield writer.writeheader()
+    for post in posts:
+        yield writer.writerow(post_record(post))
+
+
+FORMATS = {
+    'jsonl': (jsonl_lines, 'application/x-ndjson; charset=utf-8'),
+    'csv': (csv_lines, 'text/csv; charset=utf-8'),
+}
+
+
+def export_response(queryset, fmt, filename):
+    lines, content_type = FORMATS[fmt]
+    response = StreamingHttpResponse(
+        lines(iter_posts(queryset)), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,110 @@
+"""Подписки на авторов и лента подписок.
+
+Лента подписчика - строки ``TimelineEntry`` с ключом
+``follow:<user_id>``, которые раскладываются при публикации поста.
+Авторы с числом подписчиков больше ``FOLLOW_FANOUT_MAX_FOLLOWERS``
+или постов больше ``FOLLOW_FANOUT_MAX_POSTS`` переводятся в режим
+слияния: их посты не копируются по лентам, а читаются при открытии
+ленты и сливаются с ней по ``(pub_date, id)``.
+Перевод односторонний, иначе пропали бы посты, вышедшие в режиме
+слияния.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.template.loader import render_to_string
+
+from .models import Follow, Post, PostCounter, TimelineEntry
+
+
+def render_follow_button(request, username):
+    """Кнопка подписки на странице профиля ``username``."""
+
+    user = request.user
+    if not user.is_authenticated or user.username == username:
+        return ''
+    following = Follow.objects.filter(
+        user=user, author__username=username).exists()
+    return render_to_string('includes/follow_button.html', {
+        'username': username,
+        'following': following,
+    }, request=request)
+
+
+def follow(user, author):
+    """Подписывает пользователя на автора; повторная подписка ничего
+    не меняет."""
+
+    with transaction.atomic():
+        merge_on_read = Follow.objects.filter(
+            author=author, merge_on_read=True).exists()
+        _, created = Follow.objects.get_or_create(
+            user=user, author=author,
+            defaults={'merge_on_read': merge_on_read})
+        if not created:
+            return
+        if not merge_on_read and is_prolific(author):
+            switch_to_merge(author)
+            merge_on_read = True
+        if not merge_on_read:
+            # старые посты автора тоже должны быть в ленте; их не больше
+            # FOLLOW_FANOUT_MAX_POSTS, иначе автор читался бы слиянием
+            TimelineEntry.objects.bulk_create(
+                TimelineEntry(feed_key=TimelineEntry.follow_key(user.pk),
+                              pub_date=pub_date, post_id=post_id)
+                for post_id, pub_date in Post.objects.filter(
+                    author=author).values_list('pk', 'pub_date').iterator()
+            )
+        PostCounter.touch(PostCounter.follows_key(user.pk))
+
+
+def is_prolific(author):
+    """Раскладывать посты автора по лентам дорого: у него слишком много
+    подписчиков (цена каждого поста) или постов (цена новой подписки)."""
+
+    posts_count = PostCounter.get_value(PostCounter.author_key(author.pk))
+    return (posts_count > settings.FOLLOW_FANOUT_MAX_POSTS
+            or Follow.objects.filter(author=author).count()
+            > settings.FOLLOW_FANOUT_MAX_FOLLOWERS)
+
+
+def unfollow(user, author):
+    with transaction.atomic():
+        deleted, _ = Follow.objects.filter(user=user, author=author).delete()
+        if not deleted:
+            return
+        TimelineEntry.objects.filter(
+            feed_key=TimelineEntry.follow_key(user.pk),
+            post__author=author).delete()
+        PostCounter.touch(PostCounter.follows_key(user.pk))
+
+
+def switch_to_merge(author):
+    """Отключает раскладку постов автора и убирает их из лент, чтобы
+    при слиянии пост не попал в ленту дважды."""
+
+    Follow.objects.filter(author=author).update(merge_on_read=True)
+    TimelineEntry.objects.filter(
+        feed_key__startswith=TimelineEntry.follow_key(''),
+        post__author=author).delete()
+
+
+def fan_out_entries(posts):
+    """Строки лент подписчиков для новых постов авторов без слияния."""
+
+    followers = defaultdict(list)
+    for author_id, user_id in Follow.objects.filter(
+            author__in={post.author_id for post in posts},
+            merge_on_read=False).values_list('author_id', 'user_id'):
+        followers[author_id].append(user_id)
+    return [
+        TimelineEntry(feed_key=TimelineEntry.follow_key(user_id),
+                      pub_date=post.pub_date, post_id=post.pk)
+        for post in posts for user_id in followers[post.author_id]
+    ]
+
+
+def merged_authors(user):
+    return list(Follow.objects.filter(
+        user=user, merge_on_read=True).values_list('author_id', flat=True))
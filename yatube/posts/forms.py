@@ -11,3 +11,13 @@ class PostForm(forms.ModelForm):
             'text': 'Текст нового поста',
             'group': 'Группа, к которой будет относиться пост',
         }
+
+
+class PostImageForm(forms.ModelForm):
+    """Картинка поста; отдельно от PostForm, чтобы та осталась
+    формой текста и группы."""
+
+    class Meta:
+        model = Post
+        fields = ('image',)
+        help_texts = {'image': 'Картинка к посту, необязательно'}
@@ -0,0 +1,133 @@
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from posts.models import User
+
+# режим «до»: настройки SQLite по умолчанию и записи без очереди
+BASELINE = {
+    'SQLITE_PRAGMAS': {'journal_mode': 'delete', 'synchronous': 'full'},
+    'SQLITE_SERIALIZE_WRITES': False,
+}
+
+
+class Command(BaseCommand):
+    help = ('Нагружает копию базы потоками чтения ленты и создания постов '
+            'и сравнивает пропускную способность до и после настроек '
+            'SQLITE_PRAGMAS и serialized_write.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8,
+                            help='Потоков, читающих главную страницу')
+        parser.add_argument('--writers', type=int, default=4,
+                            help='Потоков, создающих посты')
+        parser.add_argument('--seconds', type=float, default=5,
+                            help='Длительность каждого прогона')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Бенчмарк рассчитан на SQLite')
+        self.writers = self.get_writers(options['writers'])
+        # ошибки блокировок считаются ниже, трассировки в логе не нужны
+        logging.getLogger('django.request').setLevel(logging.CRITICAL)
+        with tempfile.TemporaryDirectory() as directory:
+            results = []
+            for title, overrides in (('до', BASELINE), ('после', {})):
+                path = os.path.join(directory, f'{len(results)}.sqlite3')
+                with override_settings(**overrides):
+                    self.copy_database(path)
+                    results.append((title, self.run(path, options)))
+        self.report(results, options)
+
+    def get_writers(self, count):
+        return [User.objects.get_or_create(username=f'bench_writer_{i}')[0]
+                for i in range(count)]
+
+    def copy_database(self, path):
+        connection.ensure_connection()
+        target = sqlite3.connect(path)
+        try:
+            connection.connection.backup(target)
+        finally:
+            target.close()
+
+    def run(self, path, options):
+        """Один прогон на копии базы ``path``; потоки открывают к ней
+        собственные соединения с текущими настройками."""
+
+        databases = connections.databases['default']
+        original_name = databases['NAME']
+        databases['NAME'] = path
+        cache.clear()
+        self.counts = {'reads': 0, 'writes': 0, 'errors': 0}
+        self.lock = threading.Lock()
+        self.stop = time.perf_counter() + options['seconds']
+        threads = [threading.Thread(target=self.reader)
+                   for _ in range(options['readers'])]
+        threads += [threading.Thread(target=self.writer, args=(user,))
+                    for user in self.writers]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            databases['NAME'] = original_name
+        return self.counts
+
+    def worker(self, action, user=None):
+        """Повторяет ``action`` до конца прогона; возвращает число
+        успешных действий и ошибок блокировки."""
+
+        client = Client()
+        done = errors = 0
+        try:
+            if user is not None:
+                client.force_login(user)
+            while time.perf_counter() < self.stop:
+                try:
+                    action(client)
+                    done += 1
+                except OperationalError as error:
+                    if 'locked' not in str(error):
+                        raise
+                    errors += 1
+        finally:
+            connections.close_all()
+        return done, errors
+
+    def record(self, kind, done, errors):
+        with self.lock:
+            self.counts[kind] += done
+            self.counts['errors'] += errors
+
+    def reader(self):
+        self.record('reads', *self.worker(lambda client: client.get('/')))
+
+    def writer(self, user):
+        self.record('writes', *self.worker(self.create, user))
+
+    @staticmethod
+    def create(client):
+        client.post(reverse('posts:post_create'),
+                    {'text': 'Пост из бенчмарка'})
+
+    def report(self, results, options):
+        seconds = options['seconds']
+        self.stdout.write(
+            f'Читателей: {options["readers"]}, писателей: '
+            f'{options["writers"]}, по {seconds:g} с на прогон')
+        for title, counts in results:
+            self.stdout.write(
+                f'{title:>6}: чтений {counts["reads"] / seconds:8.1f}/с  '
+                f'записей {counts["writes"] / seconds:7.1f}/с  '
+                f'ошибок «database is locked»: {counts["errors"]}')
@@ -0,0 +1,99 @@
+import json
+import statistics
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.bulk import bulk_create_posts
+from posts.models import Follow, Post, TimelineEntry, User
+from posts.utils import FollowPaginator
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает раскладку постов по лентам подписчиков при записи '
+            'и слияние при чтении: цену публикации поста автором с N '
+            'подписчиками и чтения ленты читателем, подписанным на N '
+            'авторов. Все данные создаются временно и откатываются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--counts', type=int, nargs='+',
+                            default=[10, 100, 1000],
+                            help='Число подписчиков (и подписок читателя)')
+        parser.add_argument('--posts-per-author', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Замеров на каждую величину')
+        parser.add_argument('--per-page', type=int, default=10)
+
+    def handle(self, *args, **options):
+        self.password = make_password(None)
+        results = []
+        with transaction.atomic():
+            for count in options['counts']:
+                results.append(self.measure(count, options))
+                self.stderr.write(f'N={count}: готово')
+            transaction.set_rollback(True)
+        self.stdout.write(json.dumps(results, ensure_ascii=False, indent=2))
+
+    def create_users(self, prefix, count):
+        User.objects.bulk_create(
+            [User(username=f'{prefix}_{i}', password=self.password)
+             for i in range(count)])
+        return list(User.objects.filter(
+            username__startswith=f'{prefix}_').order_by('pk'))
+
+    def measure(self, count, options):
+        prefix = f'bench_follow_{count}'
+        author, = self.create_users(f'{prefix}_author', 1)
+        followers = self.create_users(f'{prefix}_follower', count)
+        Follow.objects.bulk_create(
+            [Follow(user=user, author=author) for user in followers])
+        result = {'count': count}
+        for mode, merge_on_read in (('fanout', False), ('merge', True)):
+            Follow.objects.filter(author=author).update(
+                merge_on_read=merge_on_read)
+            result[f'write_{mode}_ms'] = self.time_writes(author, options)
+
+        authors = self.create_users(f'{prefix}_writer', count)
+        readers = self.create_users(f'{prefix}_reader', 2)
+        for reader, merge_on_read in zip(readers, (False, True)):
+            Follow.objects.bulk_create(
+                [Follow(user=reader, author=writer,
+                        merge_on_read=merge_on_read) for writer in authors])
+        bulk_create_posts(
+            Post(author=writer, text=f'Пост {i}')
+            for writer in authors
+            for i in range(options['posts_per_author']))
+        for mode, reader in zip(('fanout', 'merge'), readers):
+            merged = Follow.objects.filter(
+                user=reader, merge_on_read=True).values_list(
+                'author_id', flat=True)
+            result[f'read_{mode}_ms'] = self.time_reads(
+                reader, list(merged), options)
+        return result
+
+    def time_writes(self, author, options):
+        timings = []
+        for i in range(options['repeat']):
+            start = time.perf_counter()
+            Post.objects.create(author=author, text=f'Замер {i}')
+            timings.append(time.perf_counter() - start)
+        return round(statistics.median(timings) * 1000, 3)
+
+    def time_reads(self, reader, merged_authors, options):
+        timings = []
+        for _ in range(options['repeat']):
+            start = time.perf_counter()
+            paginator = FollowPaginator(
+                TimelineEntry.objects.filter(
+                    feed_key=TimelineEntry.follow_key(reader.pk)),
+                options['per_page'],
+                posts=Post.objects.select_related('author', 'group'),
+                merged_authors=merged_authors,
+            )
+            first = paginator.get_page(1)
+            last = first.object_list[-1]
+            paginator.cursor_page(('next', last.pub_date, last.pk))
+            timings.append(time.perf_counter() - start)
+        return round(statistics.median(timings) * 1000, 3)
@@ -0,0 +1,232 @@
+import io
+import json
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+from posts.urls import urlpatterns
+
+# url, которые читают всю выборку целиком; включаются через --urls
+HEAVY = ('group_export', 'profile_export')
+# url только для POST: бенчмарк шлёт GET
+POST_ONLY = ('profile_follow', 'profile_unfollow')
+
+
+def percentile(values, share):
+    """Перцентиль по ближайшему рангу для отсортированного списка."""
+
+    if not values:
+        return None
+    index = max(0, min(len(values) - 1, round(share * len(values)) - 1))
+    return values[index]
+
+
+def milliseconds(seconds):
+    """Секунды в миллисекунды; None, если замеров не было."""
+
+    if seconds is None:
+        return None
+    return round(seconds * 1000, 2)
+
+
+class Command(BaseCommand):
+    help = ('Гоняет все url приложения posts через WSGIHandler в несколько '
+            'потоков и печатает JSON с пропускной способностью и '
+            'задержками p50/p95/p99 для сравнения между коммитами.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Запросов на каждый url')
+        parser.add_argument('--warmup', type=int, default=5,
+                            help='Запросов на url до замеров')
+        parser.add_argument('--urls', nargs='+',
+                            help='Имена url из posts.urls; по умолчанию '
+                                 'все, кроме выгрузок')
+        parser.add_argument('--output', help='Записать JSON в файл')
+
+    def handle(self, *args, **options):
+        names = options['urls'] or [
+            pattern.name for pattern in urlpatterns
+            if pattern.name not in HEAVY + POST_ONLY]
+        self.handler = WSGIHandler()
+        self.cookie = self.login_cookie()
+        targets = self.targets()
+        missing = ({pattern.name for pattern in urlpatterns}
+                   - set(targets) - set(POST_ONLY))
+        if missing:
+            raise CommandError(f'Нет цели для url: {", ".join(missing)}')
+        unknown = set(names) - set(targets)
+        if unknown:
+            raise CommandError(f'Неизвестные url: {", ".join(unknown)}')
+        # DEBUG копит SQL в connection.queries и искажает замеры
+        with override_settings(DEBUG=False):
+            results = {name: self.measure(*targets[name], options)
+                       for name in names}
+        report = {
+            'commit': self.commit(),
+            'started_at': datetime.now(timezone.utc).isoformat(),
+            'threads': options['threads'],
+            'requests_per_url': options['requests'],
+            'template_mode': settings.TEMPLATE_MODE,
+            'posts': Post.objects.count(),
+            'urls': results,
+        }
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as target:
+                target.write(output + '\n')
+        self.stdout.write(output)
+
+    def targets(self):
+        """Для каждого имени url - путь с живыми данными и нужен ли вход."""
+
+        post = Post.objects.select_related('author', 'group').filter(
+            group__isnull=False).order_by('-pub_date').first()
+        if post is None:
+            raise CommandError('Нужен хотя бы один пост в группе, '
+                               'запустите seed_data')
+        group = Group.objects.annotate(
+            total=Count('posts')).order_by('-total').first()
+        author = User.objects.annotate(
+            total=Count('posts')).order_by('-total').first()
+        word = post.text.split()[0].strip('.,!?')
+        return {
+            'index': (reverse('posts:index'), False),
+            'group_index': (reverse('posts:group_index'), False),
+            'group_list': (
+                reverse('posts:group_list', args=[group.slug]), False),
+            'group_export': (
+                reverse('posts:group_export', args=[group.slug]), False),
+            'profile': (
+                reverse('posts:profile', args=[author.username]), False),
+            'profile_export': (
+                reverse('posts:profile_export', args=[author.username]),
+                False),
+            'follow_index': (reverse('posts:follow_index'), True),
+            'search': (
+                reverse('posts:search') + '?' + urlencode({'q': word}),
+                False),
+            'post_detail': (
+                reverse('posts:post_detail', args=[post.pk]), False),
+            'post_create': (reverse('posts:post_create'), True),
+            'post_edit': (reverse('posts:post_edit', args=[post.pk]), True),
+            'api_index': (reverse('posts:api_index'), False),
+            'api_group_list': (
+                reverse('posts:api_group_list', args=[group.slug]), False),
+            'api_profile': (
+                reverse('posts:api_profile', args=[author.username]), False),
+            'api_post_detail': (
+                reverse('posts:api_post_detail', args=[post.pk]), False),
+        }
+
+    def login_cookie(self):
+        post = Post.objects.filter(group__isnull=False).order_by(
+            '-pub_date').only('author').first()
+        if post is None:
+            return ''
+        client = Client()
+        client.force_login(post.author)
+        return '; '.join(f'{key}={morsel.value}'
+                         for key, morsel in client.cookies.items())
+
+    def environ(self, url, authenticated):
+        parts = urlsplit(url)
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': parts.path,
+            'QUERY_STRING': parts.query,
+            'SCRIPT_NAME': '',
+            'SERVER_NAME': 'testserver',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(),
+            'wsgi.errors': io.StringIO(),
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        if authenticated:
+            environ['HTTP_COOKIE'] = self.cookie
+        return environ
+
+    def request(self, url, authenticated):
+        status = []
+        body = self.handler(
+            self.environ(url, authenticated),
+            lambda code, headers, exc_info=None: status.append(code))
+        try:
+            for _ in body:
+                pass
+        finally:
+            body.close()
+        return status[0]
+
+    def measure(self, url, authenticated, options):
+        for _ in range(options['warmup']):
+            self.request(url, authenticated)
+        self.latencies = []
+        self.errors = 0
+        self.lock = threading.Lock()
+        self.remaining = iter(range(options['requests']))
+        threads = [threading.Thread(target=self.worker,
+                                    args=(url, authenticated))
+                   for _ in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        latencies = sorted(self.latencies)
+        return {
+            'path': url,
+            'requests': len(latencies),
+            'errors': self.errors,
+            'rps': round(len(latencies) / elapsed, 1),
+            'p50_ms': milliseconds(percentile(latencies, 0.50)),
+            'p95_ms': milliseconds(percentile(latencies, 0.95)),
+            'p99_ms': milliseconds(percentile(latencies, 0.99)),
+        }
+
+    def worker(self, url, authenticated):
+        """Берёт запросы из общего счётчика, пока они не кончатся."""
+
+        own, failed = [], 0
+        try:
+            while True:
+                with self.lock:
+                    if next(self.remaining, None) is None:
+                        break
+                start = time.perf_counter()
+                status = self.request(url, authenticated)
+                own.append(time.perf_counter() - start)
+                if not status.startswith(('2', '3')):
+                    failed += 1
+        finally:
+            connections.close_all()
+            with self.lock:
+                self.latencies.extend(own)
+                self.errors += failed
+
+    def commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                cwd=settings.BASE_DIR, capture_output=True, text=True,
+                check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
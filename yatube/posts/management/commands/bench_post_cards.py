@@ -0,0 +1,80 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.template import Context, Engine, Template
+
+from posts.models import Post, User
+
+INCLUDE_LOOP = (
+    "{% for post in posts %}"
+    "{% include 'includes/posts_card.html' %}"
+    "{% if not forloop.last %}<hr>{% endif %}"
+    "{% endfor %}"
+)
+CACHED_CARDS = (
+    "{% load post_cards %}{% post_cards posts as cards %}"
+    "{% for card in cards %}"
+    "{{ card }}"
+    "{% if not forloop.last %}<hr>{% endif %}"
+    "{% endfor %}"
+)
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает рендер карточек ленты через include в цикле '
+            'и через кэш карточек.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10,
+                            help='Постов на странице')
+        parser.add_argument('--repeat', type=int, default=200,
+                            help='Сколько раз рендерить страницу')
+
+    def handle(self, *args, **options):
+        # недостающие посты создаются временно и откатываются в конце
+        with transaction.atomic():
+            posts = self.get_posts(options['posts'])
+            self.report(posts, options['repeat'])
+            transaction.set_rollback(True)
+
+    def get_posts(self, count):
+        posts = list(
+            Post.objects.select_related('author', 'group')[:count])
+        if len(posts) < count:
+            author, _ = User.objects.get_or_create(username='bench_author')
+            for i in range(count - len(posts)):
+                Post.objects.create(author=author, text=f'Пост {i}')
+            posts = list(
+                Post.objects.select_related('author', 'group')[:count])
+        return posts
+
+    def measure(self, template, posts, repeat, before=None):
+        context = Context({'posts': posts})
+        elapsed = 0
+        for _ in range(repeat):
+            if before is not None:
+                before()
+            start = time.perf_counter()
+            template.render(context)
+            elapsed += time.perf_counter() - start
+        return elapsed / repeat * 1000
+
+    def report(self, posts, repeat):
+        engine = Engine.get_default()
+        include_loop = Template(INCLUDE_LOOP, engine=engine)
+        cached_cards = Template(CACHED_CARDS, engine=engine)
+
+        baseline = self.measure(include_loop, posts, repeat)
+        cold = self.measure(cached_cards, posts, repeat, before=cache.clear)
+        cached_cards.render(Context({'posts': posts}))
+        warm = self.measure(cached_cards, posts, repeat)
+
+        self.stdout.write(f'Постов на странице: {len(posts)}, '
+                          f'повторов: {repeat}')
+        for title, value in (('include в цикле', baseline),
+                             ('кэш карточек, пустой', cold),
+                             ('кэш карточек, прогретый', warm)):
+            self.stdout.write(
+                f'{title:>26}: {value:8.3f} мс  x{baseline / value:.2f}')
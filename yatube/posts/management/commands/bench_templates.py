@@ -0,0 +1,97 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.forms import AuthenticationForm
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.template.backends.django import DjangoTemplates
+from django.test import RequestFactory
+
+from posts.forms import PostForm
+from posts.models import Group, Post, User
+from posts.utils import page_list
+from users.forms import CreationForm
+
+
+class Command(BaseCommand):
+    help = ('Рендерит шаблоны страниц в режимах TEMPLATE_MODE и сравнивает '
+            'время рендера и размер ответа.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200,
+                            help='Сколько раз рендерить каждый шаблон')
+
+    def handle(self, *args, **options):
+        # недостающие данные создаются временно и откатываются в конце
+        with transaction.atomic():
+            pages = self.get_pages()
+            self.report(pages, options['repeat'])
+            transaction.set_rollback(True)
+
+    def get_engine(self, mode):
+        params = dict(settings.TEMPLATES[0])
+        params.pop('BACKEND')
+        params['NAME'] = f'bench-{mode}'
+        params['APP_DIRS'] = False
+        params['OPTIONS'] = dict(
+            params['OPTIONS'], loaders=settings.TEMPLATE_LOADERS[mode])
+        return DjangoTemplates(params)
+
+    def get_pages(self):
+        author, _ = User.objects.get_or_create(username='bench_author')
+        group, _ = Group.objects.get_or_create(
+            slug='bench_group',
+            defaults={'title': 'Группа', 'description': 'Описание группы'})
+        for i in range(settings.COUNT_INDEX_POSTS - Post.objects.count()):
+            Post.objects.create(
+                author=author, group=group, text=f'Пост {i} ' * 20)
+        post = Post.objects.select_related('author', 'group').first()
+        posts = Post.objects.select_related('author', 'group')
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        page_obj = page_list(posts, request)
+        return request, {
+            'posts/index.html': {'page_obj': page_obj},
+            'posts/group_list.html': {'group': group, 'page_obj': page_obj},
+            'posts/profile.html': {'author': author, 'page_obj': page_obj},
+            'posts/post_detail.html': {
+                'post_detail': post,
+                'author_posts_count': settings.COUNT_INDEX_POSTS,
+            },
+            'posts/search.html': {
+                'query': 'пост', 'page_obj': page_obj,
+                'query_prefix': 'q=пост&'},
+            'posts/create_post.html': {'form': PostForm()},
+            'users/login.html': {'form': AuthenticationForm()},
+            'users/signup.html': {'form': CreationForm()},
+            'about/author.html': {},
+            'about/tech.html': {},
+        }
+
+    def measure(self, engine, name, context, request, repeat):
+        template = engine.get_template(name)
+        output = template.render(context, request)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            # в режиме 'debug' шаблон перечитывается, как на каждом запросе
+            engine.get_template(name).render(context, request)
+        elapsed = (time.perf_counter() - start) / repeat * 1000
+        return elapsed, len(output.encode())
+
+    def report(self, pages, repeat):
+        request, contexts = pages
+        engines = {mode: self.get_engine(mode)
+                   for mode in ('debug', 'production')}
+        self.stdout.write(f'Повторов: {repeat}')
+        self.stdout.write(
+            f'{"шаблон":<26} {"debug, мс":>10} {"байт":>7} '
+            f'{"prod, мс":>10} {"байт":>7}')
+        for name, context in contexts.items():
+            debug_ms, debug_size = self.measure(
+                engines['debug'], name, context, request, repeat)
+            prod_ms, prod_size = self.measure(
+                engines['production'], name, context, request, repeat)
+            self.stdout.write(
+                f'{name:<26} {debug_ms:10.3f} {debug_size:7} '
+                f'{prod_ms:10.3f} {prod_size:7}')
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from posts import search
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Строит полнотекстовый индекс FTS5 по существующим постам.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='Постов в одной транзакции')
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            raise CommandError('Индекс FTS5 доступен только для SQLite')
+        chunk_size = options['chunk_size']
+        table = search.FTS_TABLE
+        posts = Post._meta.db_table
+        # индекс не очищается заранее: поиск работает всё время
+        # перестройки. Чтение и запись пачки идут одним запросом, а
+        # REPLACE переписывает строки, которые сигналы успели добавить
+        refill = (f'INSERT OR REPLACE INTO {table} (rowid, text) '
+                  f'SELECT id, text FROM {posts} WHERE id > %s '
+                  f'ORDER BY id LIMIT %s')
+        chunk_end = (f'SELECT count(*), max(id) FROM (SELECT id FROM '
+                     f'{posts} WHERE id > %s ORDER BY id LIMIT %s)')
+        last_pk = 0
+        total = 0
+        while True:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(refill, [last_pk, chunk_size])
+                cursor.execute(chunk_end, [last_pk, chunk_size])
+                count, max_pk = cursor.fetchone()
+            if not count:
+                break
+            last_pk = max_pk
+            total += count
+            self.stdout.write(f'Проиндексировано постов: {total}')
+        with transaction.atomic(), connection.cursor() as cursor:
+            # строки постов, удалённых без сигнала
+            cursor.execute(
+                f'DELETE FROM {table} WHERE rowid NOT IN '
+                f'(SELECT id FROM {posts})')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} ({table}) VALUES ('optimize')")
+        self.stdout.write(self.style.SUCCESS(
+            f'Индекс построен, постов: {total}'))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import FORMATS, iter_posts
+from posts.models import Group, Post, User
+
+
+class Command(BaseCommand):
+    help = ('Потоково выгружает посты автора, группы или все посты '
+            'в JSONL или CSV.')
+
+    def add_arguments(self, parser):
+        scope = parser.add_mutually_exclusive_group()
+        scope.add_argument('--author', help='username автора')
+        scope.add_argument('--group', help='slug группы')
+        parser.add_argument('--format', choices=sorted(FORMATS),
+                            default='jsonl')
+        parser.add_argument('--output', '-o', default='-',
+                            help='Файл или - для stdout')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        queryset = Post.objects.all()
+        try:
+            if options['author']:
+                queryset = User.objects.get(
+                    username=options['author']).posts.all()
+            elif options['group']:
+                queryset = Group.objects.get(
+                    slug=options['group']).posts.all()
+        except (User.DoesNotExist, Group.DoesNotExist) as error:
+            raise CommandError(error)
+
+        lines, _ = FORMATS[options['format']]
+        posts = iter_posts(queryset, options['chunk_size'])
+        if options['output'] == '-':
+            for line in lines(posts):
+                self.stdout.write(line, ending='')
+            return
+        with open(options['output'], 'w', encoding='utf-8',
+                  newline='') as output:
+            output.writelines(lines(posts))
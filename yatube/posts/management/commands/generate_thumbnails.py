@@ -0,0 +1,81 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts import cache as page_cache
+from posts import thumbnails
+from posts.models import Post, PostCounter
+
+
+class Command(BaseCommand):
+    help = ('Строит недостающие миниатюры картинок постов и заполняет '
+            'image_hash у постов, где он пуст.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int,
+                            default=settings.THUMBNAIL_WORKERS,
+                            help='Процессов в пуле; 0 - без пула')
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='Постов, читаемых за один запрос')
+
+    def handle(self, *args, **options):
+        jobs = []
+        hashed = []
+        for post in self.iter_posts(options['chunk_size']):
+            if not post.image_hash:
+                self.fill_hash(post)
+                hashed.append(post)
+            jobs.extend(thumbnails.missing_jobs(post))
+        if hashed:
+            self.refresh_pages(hashed)
+        self.stdout.write(f'Хэшей заполнено: {len(hashed)}, '
+                          f'миниатюр к построению: {len(jobs)}')
+        self.run(jobs, options['workers'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Миниатюры готовы: {len(jobs)}'))
+
+    def fill_hash(self, post):
+        # update() вместо save(): сигнал save поставил бы те же миниатюры
+        # в пул второй раз
+        with post.image.open('rb'):
+            post.image_hash = thumbnails.file_hash(post.image)
+        Post.objects.filter(pk=post.pk).update(
+            image_hash=post.image_hash, updated=timezone.now())
+
+    def refresh_pages(self, posts):
+        """Сбрасывает страницы и ETag, где карточки были без картинки."""
+
+        author_ids = {post.author_id for post in posts}
+        group_ids = {post.group_id for post in posts if post.group_id}
+        PostCounter.touch(
+            PostCounter.TOTAL,
+            *[PostCounter.author_key(pk) for pk in author_ids],
+            *[PostCounter.group_key(pk) for pk in group_ids])
+        page_cache.invalidate(
+            *page_cache.post_page_scopes(author_ids, group_ids))
+
+    def iter_posts(self, chunk_size):
+        last_pk = 0
+        while True:
+            posts = list(
+                Post.objects.exclude(image='').filter(pk__gt=last_pk)
+                .order_by('pk')[:chunk_size])
+            if not posts:
+                return
+            yield from posts
+            last_pk = posts[-1].pk
+
+    def run(self, jobs, workers):
+        if not workers:
+            for job in jobs:
+                thumbnails.render_thumbnail(*job)
+            return
+        with ProcessPoolExecutor(max_workers=workers,
+                                 mp_context=get_context('spawn')) as pool:
+            for future in as_completed(
+                    [pool.submit(thumbnails.render_thumbnail, *job)
+                     for job in jobs]):
+                future.result()
@@ -0,0 +1,238 @@
+import csv
+import io
+import json
+import os
+import sys
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.bulk import bulk_create_posts
+from posts.models import Group, Post
+
+User = get_user_model()
+
+# сколько авторов и групп держать в памяти, прежде чем сбросить карту
+LOOKUP_CACHE_LIMIT = 10000
+
+
+class RecordError(ValueError):
+    pass
+
+
+class Lookup:
+    """Карта «имя -> id», которая дозаполняется из базы пачками."""
+
+    def __init__(self, model, field, create=None):
+        self.model = model
+        self.field = field
+        self.create = create
+        self.ids = {}
+
+    def fill(self, names):
+        names = {name for name in names if name and isinstance(name, str)}
+        missing = names - set(self.ids)
+        if not missing:
+            return
+        if len(self.ids) + len(missing) > LOOKUP_CACHE_LIMIT:
+            self.ids.clear()
+            missing = names
+        found = self.model.objects.filter(
+            **{f'{self.field}__in': missing}).values_list(self.field, 'pk')
+        self.ids.update(found)
+        if self.create is not None:
+            new = missing - set(self.ids)
+            if new:
+                self.model.objects.bulk_create(
+                    [self.create(name) for name in new],
+                    ignore_conflicts=True)
+                self.ids.update(self.model.objects.filter(
+                    **{f'{self.field}__in': new}).values_list(
+                        self.field, 'pk'))
+
+    def get(self, name):
+        return self.ids.get(name)
+
+
+def read_jsonl(stream):
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as error:
+            yield RecordError(f'некорректный JSON: {error}')
+
+
+def read_csv(stream):
+    yield from csv.DictReader(stream)
+
+
+READERS = {'jsonl': read_jsonl, 'csv': read_csv}
+# поля записи; в JSONL в них может прийти что угодно, не только строка
+RECORD_FIELDS = ('text', 'author', 'group', 'pub_date')
+
+
+def parse_pub_date(value):
+    """Дата записи с часовым поясом; None, если даты в записи нет."""
+
+    if not value:
+        return None
+    try:
+        pub_date = parse_datetime(str(value))
+    except ValueError:
+        pub_date = None
+    if pub_date is None:
+        raise RecordError(f'некорректная дата {value!r}')
+    if timezone.is_naive(pub_date):
+        pub_date = timezone.make_aware(pub_date)
+    return pub_date
+
+
+class Command(BaseCommand):
+    help = ('Потоково импортирует посты из JSONL или CSV (файл или stdin). '
+            'Поля записи: text, author (username), group (slug), pub_date. '
+            'Контрольная точка пишется после каждой пачки; пачка, '
+            'оборванная между коммитом и записью точки, при --resume '
+            'может быть загружена повторно.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help='Путь к файлу или - для stdin')
+        parser.add_argument('--format', choices=sorted(READERS),
+                            help='По умолчанию - по расширению файла')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--checkpoint',
+                            help='Файл контрольной точки')
+        parser.add_argument('--resume', action='store_true',
+                            help='Продолжить с контрольной точки')
+        parser.add_argument('--create-missing', action='store_true',
+                            help='Создавать неизвестных авторов и группы')
+
+    def handle(self, *args, **options):
+        source = options['source']
+        fmt = options['format'] or self.guess_format(source)
+        skip = self.load_checkpoint(options) if options['resume'] else 0
+        create = options['create_missing']
+        self.authors = Lookup(
+            User, 'username',
+            create=(lambda name: User(username=name,
+                                      password=make_password(None)))
+            if create else None)
+        self.groups = Lookup(
+            Group, 'slug',
+            create=(lambda slug: Group(title=slug, slug=slug,
+                                       description=''))
+            if create else None)
+        self.imported = self.skipped = 0
+        self.started = time.monotonic()
+
+        stream = self.open(source)
+        try:
+            batch = []
+            position = 0
+            for position, record in enumerate(READERS[fmt](stream), 1):
+                if position <= skip:
+                    continue
+                batch.append((position, record))
+                if len(batch) >= options['batch_size']:
+                    self.flush(batch, options)
+                    batch = []
+            if batch:
+                self.flush(batch, options)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано: {self.imported}, пропущено: {self.skipped}'))
+
+    def guess_format(self, source):
+        extension = os.path.splitext(source)[1].lstrip('.').lower()
+        if extension in READERS:
+            return extension
+        if source == '-':
+            return 'jsonl'
+        raise CommandError('Укажите формат через --format')
+
+    def open(self, source):
+        if source == '-':
+            return io.TextIOWrapper(
+                sys.stdin.buffer, encoding='utf-8', newline='')
+        try:
+            return open(source, encoding='utf-8', newline='')
+        except OSError as error:
+            raise CommandError(error)
+
+    def load_checkpoint(self, options):
+        path = options['checkpoint']
+        if not path:
+            raise CommandError('Для --resume нужен --checkpoint')
+        try:
+            with open(path) as checkpoint:
+                return json.load(checkpoint)['position']
+        except FileNotFoundError:
+            return 0
+
+    def save_checkpoint(self, options, position):
+        path = options['checkpoint']
+        if not path:
+            return
+        with open(path + '.tmp', 'w') as checkpoint:
+            json.dump({'position': position, 'imported': self.imported},
+                      checkpoint)
+        os.replace(path + '.tmp', path)
+
+    def flush(self, batch, options):
+        records = [record for _, record in batch
+                   if isinstance(record, dict)]
+        self.authors.fill(record.get('author') for record in records)
+        self.groups.fill(record.get('group') for record in records)
+        posts = []
+        for position, record in batch:
+            try:
+                posts.append(self.build_post(record))
+            except RecordError as error:
+                self.skipped += 1
+                self.stderr.write(f'Запись {position} пропущена: {error}')
+        bulk_create_posts(posts, keep_dates=True)
+        self.imported += len(posts)
+        self.save_checkpoint(options, batch[-1][0])
+        rate = self.imported / max(time.monotonic() - self.started, 1e-6)
+        self.stdout.write(
+            f'Запись {batch[-1][0]}: импортировано {self.imported}, '
+            f'{rate:.0f} постов/с')
+
+    def build_post(self, record):
+        if isinstance(record, RecordError):
+            raise record
+        if not isinstance(record, dict):
+            raise RecordError('запись должна быть объектом')
+        for field in RECORD_FIELDS:
+            value = record.get(field)
+            if value is not None and not isinstance(value, str):
+                raise RecordError(f'поле {field} должно быть строкой')
+        text = record.get('text')
+        if not text:
+            raise RecordError('нет текста')
+        return Post(text=text,
+                    author_id=self.author_id(record),
+                    group_id=self.group_id(record),
+                    pub_date=parse_pub_date(record.get('pub_date')))
+
+    def author_id(self, record):
+        author_id = self.authors.get(record.get('author'))
+        if author_id is None:
+            raise RecordError(f'неизвестный автор {record.get("author")!r}')
+        return author_id
+
+    def group_id(self, record):
+        if not record.get('group'):
+            return None
+        group_id = self.groups.get(record['group'])
+        if group_id is None:
+            raise RecordError(f'неизвестная группа {record["group"]!r}')
+        return group_id
@@ -0,0 +1,38 @@
+import json
+from collections import Counter, defaultdict
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from posts.models import Group, GroupStats, Post
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает с нуля сводку активности групп для каталога.'
+
+    def handle(self, *args, **options):
+        first_day = GroupStats.first_recent_day()
+        since = timezone.make_aware(datetime.combine(first_day, time.min))
+        recent = defaultdict(Counter)
+        for group_id, pub_date in Post.objects.filter(
+                group__isnull=False, pub_date__gte=since,
+        ).values_list('group_id', 'pub_date').iterator():
+            recent[group_id][timezone.localdate(pub_date).isoformat()] += 1
+        last_posts = dict(Post.objects.order_by().filter(
+            group__isnull=False).values('group').annotate(
+            last=Max('pub_date')).values_list('group', 'last'))
+        stats = [
+            GroupStats(group_id=group_id,
+                       last_post_at=last_posts.get(group_id),
+                       recent=json.dumps(dict(sorted(
+                           recent[group_id].items()))))
+            for group_id in Group.objects.values_list('pk', flat=True)
+        ]
+        with transaction.atomic():
+            GroupStats.objects.all().delete()
+            GroupStats.objects.bulk_create(stats, batch_size=500)
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано групп: {len(stats)}'))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from posts.models import Post, PostCounter
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает с нуля счётчики постов авторов и групп.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            counters = self.collect()
+            PostCounter.objects.all().delete()
+            PostCounter.objects.bulk_create(counters, batch_size=500)
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано счётчиков: {len(counters)}'))
+
+    def collect(self):
+        counters = [PostCounter(
+            key=PostCounter.TOTAL, value=Post.objects.count())]
+        by_author = Post.objects.order_by().values('author').annotate(
+            total=Count('pk'))
+        counters.extend(
+            PostCounter(key=PostCounter.author_key(row['author']),
+                        value=row['total'])
+            for row in by_author
+        )
+        by_group = Post.objects.order_by().filter(
+            group__isnull=False).values('group').annotate(total=Count('pk'))
+        counters.extend(
+            PostCounter(key=PostCounter.group_key(row['group']),
+                        value=row['total'])
+            for row in by_group
+        )
+        return counters
@@ -0,0 +1,121 @@
+import random
+import time
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from faker import Faker
+
+from posts.bulk import bulk_create_posts
+from posts.models import Group, Post
+
+User = get_user_model()
+
+# сколько разных предложений сгенерировать, чтобы собирать из них тексты
+SENTENCE_POOL = 2000
+
+
+def zipf_weights(count, exponent):
+    """Накопленные веса Ципфа: первый элемент самый популярный."""
+
+    return list(accumulate(1 / rank ** exponent
+                           for rank in range(1, count + 1)))
+
+
+class Command(BaseCommand):
+    help = ('Быстро наполняет базу пользователями, группами и постами '
+            'с перекосом популярности авторов и групп (закон Ципфа).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--skew', type=float, default=1.1,
+                            help='Показатель Ципфа; 0 - равномерно')
+        parser.add_argument('--no-group-share', type=float, default=0.2,
+                            help='Доля постов без группы')
+        parser.add_argument('--days', type=int, default=365,
+                            help='За сколько дней разбросать даты постов')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Зерно генератора для повторяемых данных')
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.fake = Faker('ru_RU')
+        self.fake.seed_instance(options['seed'])
+        started = time.monotonic()
+
+        author_ids = self.create_users(options['users'])
+        group_ids = self.create_groups(options['groups'])
+        self.stdout.write(f'Пользователей: {len(author_ids)}, '
+                          f'групп: {len(group_ids)}')
+        # популярность не должна совпадать с порядком создания
+        self.random.shuffle(author_ids)
+        self.random.shuffle(group_ids)
+        self.create_posts(author_ids, group_ids, options)
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.monotonic() - started:.1f} с'))
+
+    def create_users(self, count):
+        prefix = f'seed{self.random.randrange(10 ** 6)}'
+        # один хэш на всех: make_password на каждого занял бы минуты
+        password = make_password(None)
+        users = [
+            User(username=f'{prefix}_{i}', password=password,
+                 first_name=self.fake.first_name(),
+                 last_name=self.fake.last_name())
+            for i in range(count)
+        ]
+        User.objects.bulk_create(users)
+        return list(User.objects.filter(
+            username__startswith=f'{prefix}_').values_list('pk', flat=True))
+
+    def create_groups(self, count):
+        prefix = f'seed{self.random.randrange(10 ** 6)}'
+        groups = [
+            Group(title=self.fake.catch_phrase()[:200],
+                  slug=f'{prefix}-{i}',
+                  description=self.fake.paragraph())
+            for i in range(count)
+        ]
+        Group.objects.bulk_create(groups)
+        return list(Group.objects.filter(
+            slug__startswith=f'{prefix}-').values_list('pk', flat=True))
+
+    def create_posts(self, author_ids, group_ids, options):
+        sentences = [self.fake.sentence(nb_words=12)
+                     for _ in range(SENTENCE_POOL)]
+        author_weights = zipf_weights(len(author_ids), options['skew'])
+        group_weights = zipf_weights(len(group_ids), options['skew'])
+        now = timezone.now()
+        span = options['days'] * 24 * 60 * 60
+        total = options['posts']
+        created = 0
+        started = time.monotonic()
+        while created < total:
+            size = min(options['batch_size'], total - created)
+            authors = self.random.choices(
+                author_ids, cum_weights=author_weights, k=size)
+            groups = self.random.choices(
+                group_ids, cum_weights=group_weights, k=size) \
+                if group_ids else [None] * size
+            posts = []
+            for author_id, group_id in zip(authors, groups):
+                if self.random.random() < options['no_group_share']:
+                    group_id = None
+                posts.append(Post(
+                    author_id=author_id,
+                    group_id=group_id,
+                    text=' '.join(self.random.sample(
+                        sentences, self.random.randint(1, 6))),
+                    pub_date=now - timedelta(
+                        seconds=self.random.randrange(span)),
+                ))
+            bulk_create_posts(posts, keep_dates=True)
+            created += size
+            rate = created / max(time.monotonic() - started, 1e-6)
+            self.stdout.write(f'Постов: {created}/{total}, {rate:.0f}/с')
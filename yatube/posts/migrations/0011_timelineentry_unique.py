@@ -0,0 +1,24 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_follow'),
+    ]
+
+    operations = [
+        # повторы, записанные сигналом и перестройкой лент одновременно
+        migrations.RunSQL(
+            'DELETE FROM posts_timelineentry WHERE id NOT IN ('
+            'SELECT MIN(id) FROM posts_timelineentry '
+            'GROUP BY feed_key, post_id)',
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddConstraint(
+            model_name='timelineentry',
+            constraint=models.UniqueConstraint(fields=('feed_key', 'post'), name='timeline_entry_unique'),
+        ),
+    ]
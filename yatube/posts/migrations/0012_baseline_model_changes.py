@@ -0,0 +1,54 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def rename_duplicate_slugs(apps, schema_editor):
+    """До уникального slug повторы получают суффикс с id группы."""
+
+    Group = apps.get_model('posts', 'Group')
+    duplicates = Group.objects.values('slug').annotate(
+        total=models.Count('pk')).filter(total__gt=1).values('slug')
+    seen = set()
+    for group in Group.objects.filter(
+            slug__in=duplicates).order_by('slug', 'pk'):
+        if group.slug not in seen:
+            seen.add(group.slug)
+            continue
+        suffix = f'-{group.pk}'
+        group.slug = group.slug[:50 - len(suffix)] + suffix
+        group.save(update_fields=['slug'])
+
+
+class Migration(migrations.Migration):
+    # правки моделей, которые в исходном коде уже были, а в миграции не
+    # попали: порядок постов, уникальный slug группы, заголовок без
+    # значения по умолчанию и SET_NULL для группы поста
+
+    dependencies = [
+        ('posts', '0011_timelineentry_unique'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='post',
+            options={'ordering': ['-pub_date']},
+        ),
+        migrations.RunPython(rename_duplicate_slugs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='group',
+            name='slug',
+            field=models.SlugField(unique=True),
+        ),
+        migrations.AlterField(
+            model_name='group',
+            name='title',
+            field=models.CharField(max_length=200),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='group',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='posts', to='posts.Group'),
+        ),
+    ]
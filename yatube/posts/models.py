@@ -1,6 +1,13 @@
-from django.db import models
+import json
+from datetime import timedelta
+
+from django.db import models, transaction
+from django.db.models import F, Max, Q
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 
+from .thumbnails import file_hash
+
 User = get_user_model()
 
 
@@ -9,13 +16,28 @@ class Group(models.Model):
     slug = models.SlugField(unique=True)
     description = models.TextField()
 
+    # slug, с которым группа загружена из базы: старые адреса страниц
+    # группы нужно сбросить из кэша после смены slug
+    _loaded_slug = None
+
     def __str__(self) -> str:
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_slug = instance.__dict__.get('slug')
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_slug = self.slug
+
 
 class Post(models.Model):
     text = models.TextField()
     pub_date = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
 
     author = models.ForeignKey(
         User,
@@ -27,9 +49,262 @@ class Post(models.Model):
         on_delete=models.SET_NULL,
         related_name='posts'
     )
+    image = models.ImageField('Картинка', upload_to='posts/', blank=True)
+    # sha1 файла картинки: по нему строятся имена готовых миниатюр
+    image_hash = models.CharField(max_length=40, blank=True, editable=False)
+
+    # группа, с которой пост был загружен из базы: по ней сигналы
+    # понимают, что пост перенесли в другую группу
+    _loaded_group_id = None
 
     def __str__(self) -> str:
         return self.text[:15]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_group_id = instance.__dict__.get('group_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        if not self.image:
+            self.image_hash = ''
+        elif not self.image._committed:
+            # новая загрузка: файл ещё в памяти или во временном файле
+            self.image_hash = file_hash(self.image)
+        # счётчики обновляются в post_save, в той же транзакции
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+        self._loaded_group_id = self.group_id
+
     class Meta:
         ordering = ["-pub_date"]
+        indexes = [
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_feed_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_feed_idx'),
+            models.Index(fields=['-pub_date', '-id'],
+                         name='post_feed_idx'),
+        ]
+
+
+class PostCounter(models.Model):
+    """Денормализованный счётчик постов: всего, у автора и в группе.
+
+    ``modified`` сдвигается при любой правке постов области, поэтому
+    счётчик заодно служит дешёвым источником Last-Modified и ETag.
+    """
+
+    TOTAL = 'all'
+    # без значения: время последней правки любой группы
+    GROUPS = 'groups'
+
+    key = models.CharField(max_length=64, primary_key=True)
+    value = models.PositiveIntegerField(default=0)
+    modified = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f'{self.key}={self.value}'
+
+    @staticmethod
+    def author_key(author_id):
+        return f'author:{author_id}'
+
+    @staticmethod
+    def group_key(group_id):
+        return f'group:{group_id}'
+
+    @staticmethod
+    def follows_key(user_id):
+        # без значения: время последней подписки или отписки пользователя
+        return f'follows:{user_id}'
+
+    @classmethod
+    def get_value(cls, key):
+        return cls.objects.filter(key=key).values_list(
+            'value', flat=True).first() or 0
+
+    @classmethod
+    def change(cls, key, delta):
+        """Атомарно сдвигает счётчик на delta, не уходя ниже нуля."""
+
+        counters = cls.objects.filter(key=key)
+        if delta < 0:
+            counters = counters.filter(value__gte=-delta)
+        updated = counters.update(
+            value=F('value') + delta, modified=timezone.now())
+        if not updated and delta > 0:
+            counter, created = cls.objects.get_or_create(
+                key=key, defaults={'value': delta})
+            if not created:
+                cls.objects.filter(key=key).update(
+                    value=F('value') + delta, modified=timezone.now())
+
+    @classmethod
+    def touch(cls, *keys):
+        """Отмечает правку в областях, не меняя числа постов."""
+
+        now = timezone.now()
+        touched = cls.objects.filter(key__in=keys)
+        if touched.update(modified=now) < len(set(keys)):
+            cls.objects.bulk_create(
+                [cls(key=key, modified=now) for key in set(keys)],
+                ignore_conflicts=True)
+
+
+class GroupStats(models.Model):
+    """Сводка активности группы для каталога групп.
+
+    Ведётся сигналами и ``bulk_create_posts`` при записи постов, поэтому
+    каталог читает готовые цифры, не считая посты. Число постов группы
+    хранится в ``PostCounter``.
+    """
+
+    # за сколько последних дней считаются свежие посты
+    RECENT_DAYS = 7
+
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    last_post_at = models.DateTimeField(null=True, blank=True)
+    # постов по дням за последние RECENT_DAYS дней: {"2026-10-18": 3}
+    recent = models.TextField(default='{}')
+
+    def __str__(self) -> str:
+        return f'{self.group_id}: {self.recent}'
+
+    @classmethod
+    def first_recent_day(cls):
+        return timezone.localdate() - timedelta(days=cls.RECENT_DAYS - 1)
+
+    @property
+    def recent_posts(self):
+        first_day = self.first_recent_day().isoformat()
+        return sum(count for day, count in json.loads(self.recent).items()
+                   if day >= first_day)
+
+    @classmethod
+    def record(cls, group_id, pub_dates, delta):
+        """Учитывает добавленные (delta=1) или удалённые (delta=-1) посты
+        группы с датами ``pub_dates``.
+
+        Вызывается после записи самих постов в той же транзакции: строка
+        поста уже заблокирована, и чтение-правка сводки не гоняется
+        с другими писателями.
+        """
+        stats, _ = cls.objects.select_for_update().get_or_create(
+            group_id=group_id)
+        first_day = cls.first_recent_day()
+        recent = json.loads(stats.recent)
+        for pub_date in pub_dates:
+            day = timezone.localdate(pub_date)
+            if day >= first_day:
+                key = day.isoformat()
+                recent[key] = recent.get(key, 0) + delta
+        stats.recent = json.dumps({
+            day: count for day, count in sorted(recent.items())
+            if day >= first_day.isoformat() and count > 0})
+        if delta > 0:
+            stats.last_post_at = max(
+                filter(None, [stats.last_post_at, *pub_dates]))
+        elif stats.last_post_at and max(pub_dates) >= stats.last_post_at:
+            stats.last_post_at = Post.objects.filter(
+                group_id=group_id).aggregate(last=Max('pub_date'))['last']
+        stats.save()
+
+
+class Follow(models.Model):
+    """Подписка ``user`` на посты ``author``.
+
+    Посты обычных авторов при публикации раскладываются по лентам
+    подписчиков (``TimelineEntry.follow_key``). У авторов, чьих
+    подписчиков больше ``FOLLOW_FANOUT_MAX_FOLLOWERS`` или постов больше
+    ``FOLLOW_FANOUT_MAX_POSTS``, раскладка отключается
+    (``merge_on_read``), и их посты подмешиваются в ленту при чтении.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follower'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='following'
+    )
+    merge_on_read = models.BooleanField(default=False)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f'{self.user_id} -> {self.author_id}'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'author'],
+                                    name='unique_follow'),
+            models.CheckConstraint(check=~Q(user=F('author')),
+                                   name='no_self_follow'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'merge_on_read'],
+                         name='follow_user_mode_idx'),
+            models.Index(fields=['author', 'merge_on_read'],
+                         name='follow_author_mode_idx'),
+        ]
+
+
+class TimelineEntry(models.Model):
+    """Строка материализованной ленты: пост в ленте ``feed_key``.
+
+    Ленты главной страницы (``all``), групп (``group:<id>``) и подписок
+    (``follow:<user_id>``) читаются узким диапазоном по индексу
+    ``(feed_key, pub_date, post_id)``, а сами посты догружаются одним
+    запросом по id.
+    """
+
+    ALL = 'all'
+
+    feed_key = models.CharField(max_length=32)
+    pub_date = models.DateTimeField()
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries'
+    )
+
+    def __str__(self) -> str:
+        return f'{self.feed_key}: {self.post_id}'
+
+    @staticmethod
+    def group_key(group_id):
+        return f'group:{group_id}'
+
+    @staticmethod
+    def follow_key(user_id):
+        return f'follow:{user_id}'
+
+    @classmethod
+    def entries_for(cls, post):
+        keys = [cls.ALL]
+        if post.group_id:
+            keys.append(cls.group_key(post.group_id))
+        return [cls(feed_key=key, pub_date=post.pub_date, post_id=post.pk)
+                for key in keys]
+
+    class Meta:
+        ordering = ['-pub_date', '-post_id']
+        indexes = [
+            models.Index(fields=['feed_key', '-pub_date', '-post'],
+                         name='timeline_feed_idx'),
+        ]
+        constraints = [
+            # пост попадает в ленту один раз, даже если его запишут и
+            # сигнал, и перестройка лент
+            models.UniqueConstraint(fields=['feed_key', 'post'],
+                                    name='timeline_entry_unique'),
+        ]
@@ -0,0 +1,113 @@
+import re
+
+from django.db import connection
+
+from .models import Post
+
+FTS_TABLE = 'posts_post_fts'
+# слова запроса; служебный синтаксис FTS5 пользователю недоступен
+WORD_RE = re.compile(r'\w+')
+
+
+def is_available():
+    """Индекс FTS5 есть только у SQLite, на других базах ищем LIKE."""
+
+    return connection.vendor == 'sqlite'
+
+
+def match_expression(query):
+    """Запрос пользователя как выражение MATCH: все слова, с префиксом.
+
+    Каждое слово берётся в кавычки, поэтому кавычки, звёздочки и
+    операторы FTS5 во вводе не ломают разбор запроса.
+    """
+    words = WORD_RE.findall(query)
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def index_post(post):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post.pk])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)',
+            [post.pk, post.text]
+        )
+
+
+def index_new_posts(posts):
+    """Добавляет в индекс только что вставленные посты одним executemany."""
+
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)',
+            [(post.pk, post.text) for post in posts]
+        )
+
+
+def unindex_post(post_id):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+
+
+def matching_ids_sql(match):
+    """Подзапрос id постов, подходящих под выражение MATCH."""
+
+    return (f'SELECT rowid FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s'), [match]
+
+
+class SearchResults:
+    """Ранжированная выдача поиска для ``Paginator``.
+
+    Срез читает из индекса только id нужной страницы в порядке
+    релевантности (bm25), посты догружаются одним запросом. Подсчёт
+    ограничен ``limit`` совпадениями, чтобы не проходить по всем.
+    """
+
+    def __init__(self, query, posts, limit):
+        self.match = match_expression(query)
+        self.posts = posts
+        self.limit = limit
+
+    def count(self):
+        if self.match is None:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM (SELECT rowid FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s LIMIT %s)',
+                [self.match, self.limit]
+            )
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError('SearchResults поддерживает только срезы')
+        if self.match is None:
+            return []
+        start = index.start or 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY rank LIMIT %s OFFSET %s',
+                [self.match, index.stop - start, start]
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        posts = self.posts.in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+
+def search_posts(query, limit):
+    """Объект выдачи для ``Paginator``: FTS5 или LIKE вне SQLite."""
+
+    posts = Post.objects.select_related('author', 'group')
+    if is_available():
+        return SearchResults(query, posts, limit)
+    return posts.filter(text__icontains=query)
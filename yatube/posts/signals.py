@@ -0,0 +1,210 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import cache as page_cache
+from core.signals import replica_refreshed
+
+from . import follow, search, thumbnails
+from .models import (
+    Group, GroupStats, Post, PostCounter, TimelineEntry, User,
+)
+
+# поля пользователя, которые показываются в карточках постов
+AUTHOR_CARD_FIELDS = {'username', 'first_name', 'last_name'}
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, raw, **kwargs):
+    """Учитывает новый пост или его перенос в другую группу."""
+
+    if raw:
+        return
+    if created:
+        PostCounter.change(PostCounter.TOTAL, 1)
+        PostCounter.change(PostCounter.author_key(instance.author_id), 1)
+        if instance.group_id:
+            PostCounter.change(PostCounter.group_key(instance.group_id), 1)
+    elif instance._loaded_group_id != instance.group_id:
+        if instance._loaded_group_id:
+            PostCounter.change(
+                PostCounter.group_key(instance._loaded_group_id), -1)
+        if instance.group_id:
+            PostCounter.change(PostCounter.group_key(instance.group_id), 1)
+    if not created:
+        keys = [PostCounter.TOTAL, PostCounter.author_key(instance.author_id)]
+        if instance.group_id:
+            keys.append(PostCounter.group_key(instance.group_id))
+        PostCounter.touch(*keys)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    PostCounter.change(PostCounter.TOTAL, -1)
+    PostCounter.change(PostCounter.author_key(instance.author_id), -1)
+    if instance.group_id:
+        PostCounter.change(PostCounter.group_key(instance.group_id), -1)
+
+
+@receiver(post_save, sender=Group)
+def touch_group_counter(sender, instance, raw, **kwargs):
+    if not raw:
+        PostCounter.touch(
+            PostCounter.GROUPS, PostCounter.group_key(instance.pk))
+
+
+@receiver(post_delete, sender=Group)
+def drop_group_counter(sender, instance, **kwargs):
+    PostCounter.objects.filter(
+        key=PostCounter.group_key(instance.pk)).delete()
+    PostCounter.touch(PostCounter.GROUPS)
+
+
+@receiver(post_save, sender=Post)
+def record_group_activity(sender, instance, created, raw, **kwargs):
+    """Ведёт сводку активности групп для каталога."""
+
+    if raw:
+        return
+    if created:
+        if instance.group_id:
+            GroupStats.record(instance.group_id, [instance.pub_date], 1)
+    elif instance._loaded_group_id != instance.group_id:
+        if instance._loaded_group_id:
+            GroupStats.record(
+                instance._loaded_group_id, [instance.pub_date], -1)
+        if instance.group_id:
+            GroupStats.record(instance.group_id, [instance.pub_date], 1)
+
+
+@receiver(post_delete, sender=Post)
+def forget_group_activity(sender, instance, **kwargs):
+    if instance.group_id:
+        GroupStats.record(instance.group_id, [instance.pub_date], -1)
+
+
+@receiver(post_save, sender=Group)
+def create_group_stats(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        GroupStats.objects.get_or_create(group=instance)
+
+
+@receiver(post_delete, sender=User)
+def drop_author_counter(sender, instance, **kwargs):
+    PostCounter.objects.filter(key__in=[
+        PostCounter.author_key(instance.pk),
+        PostCounter.follows_key(instance.pk),
+    ]).delete()
+
+
+@receiver(post_delete, sender=User)
+def drop_follow_feed(sender, instance, **kwargs):
+    TimelineEntry.objects.filter(
+        feed_key=TimelineEntry.follow_key(instance.pk)).delete()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    group_ids = {instance.group_id, instance._loaded_group_id} - {None}
+    page_cache.invalidate(
+        *page_cache.post_page_scopes([instance.author_id], group_ids))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_pages(sender, instance, **kwargs):
+    slugs = {instance.slug, instance._loaded_slug} - {None}
+    page_cache.invalidate(
+        'index', 'groups', *(f'group:{slug}' for slug in slugs))
+
+
+@receiver(post_init, sender=User)
+def remember_loaded_username(sender, instance, **kwargs):
+    """Запоминает имя, с которым пользователь загружен: адреса профиля
+    со старым именем нужно сбросить из кэша после переименования."""
+
+    instance._loaded_username = instance.__dict__.get('username')
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_pages(sender, instance, created, raw,
+                            update_fields=None, **kwargs):
+    """Имя автора есть в карточках всех его постов: после правки
+    пользователя сбрасываются карточки, страницы и ETag его лент."""
+
+    loaded_username = getattr(instance, '_loaded_username', None)
+    instance._loaded_username = instance.username
+    if created or raw:
+        return
+    if update_fields and not AUTHOR_CARD_FIELDS & set(update_fields):
+        # вход (last_login) и смена пароля карточек не меняют
+        return
+    group_ids = set(Post.objects.filter(author=instance).exclude(
+        group=None).values_list('group_id', flat=True).distinct())
+    scopes = page_cache.post_page_scopes([instance.pk], group_ids)
+    if loaded_username and loaded_username != instance.username:
+        scopes.append(f'profile:{loaded_username}')
+    page_cache.invalidate(page_cache.author_scope(instance.pk), *scopes)
+    PostCounter.touch(
+        PostCounter.TOTAL, PostCounter.author_key(instance.pk),
+        *(PostCounter.group_key(pk) for pk in group_ids))
+
+
+@receiver(post_save, sender=Post)
+def update_timeline(sender, instance, created, raw, **kwargs):
+    """Записывает пост в ленты главной страницы, его группы
+    и подписчиков автора.
+
+    Удалённые посты уходят из лент каскадом по внешнему ключу.
+    """
+    if raw:
+        return
+    if created:
+        TimelineEntry.objects.bulk_create(
+            TimelineEntry.entries_for(instance)
+            + follow.fan_out_entries([instance]))
+    elif instance._loaded_group_id != instance.group_id:
+        TimelineEntry.objects.filter(
+            post=instance,
+            feed_key=TimelineEntry.group_key(instance._loaded_group_id),
+        ).delete()
+        if instance.group_id:
+            TimelineEntry.objects.create(
+                feed_key=TimelineEntry.group_key(instance.group_id),
+                pub_date=instance.pub_date,
+                post=instance
+            )
+
+
+@receiver(post_delete, sender=Group)
+def drop_group_timeline(sender, instance, **kwargs):
+    TimelineEntry.objects.filter(
+        feed_key=TimelineEntry.group_key(instance.pk)).delete()
+
+
+@receiver(post_save, sender=Post)
+def index_saved_post(sender, instance, raw, **kwargs):
+    if not raw and search.is_available():
+        search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_deleted_post(sender, instance, **kwargs):
+    if search.is_available():
+        search.unindex_post(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def schedule_thumbnails(sender, instance, raw, **kwargs):
+    """Отдаёт миниатюры новой картинки пулу процессов после коммита."""
+
+    if not raw and instance.image_hash:
+        transaction.on_commit(lambda: thumbnails.schedule(instance))
+
+
+@receiver(replica_refreshed)
+def invalidate_replica_pages(sender, **kwargs):
+    """Страницы, прочитанные с прошлого снимка реплики, устарели."""
+
+    page_cache.invalidate(page_cache.REPLICA_SCOPE)
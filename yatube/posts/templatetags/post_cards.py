@@ -0,0 +1,48 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from posts.cache import author_scope, scope_versions
+
+register = template.Library()
+
+CARD_TEMPLATE = 'includes/posts_card.html'
+
+
+def card_key(post, groups_version, author_version):
+    """Ключ карточки меняется вместе с постом, его автором и с любой
+    правкой групп."""
+
+    return (f'post-card:{groups_version}:{author_version}:{post.pk}:'
+            f'{post.updated.timestamp()}')
+
+
+@register.simple_tag
+def post_cards(posts):
+    """HTML карточек постов страницы в порядке постов.
+
+    Готовые карточки берутся из кэша одним get_many, рендерятся только
+    отсутствующие. Использование: ``{% post_cards page_obj as cards %}``.
+    """
+
+    posts = list(posts)
+    author_ids = sorted({post.author_id for post in posts})
+    groups_version, *author_versions = scope_versions(
+        ['groups', *(author_scope(pk) for pk in author_ids)])
+    author_versions = dict(zip(author_ids, author_versions))
+    keys = [card_key(post, groups_version, author_versions[post.author_id])
+            for post in posts]
+    cards = cache.get_many(keys)
+    missing = {}
+    card_template = None
+    for key, post in zip(keys, posts):
+        if key not in cards:
+            if card_template is None:
+                card_template = get_template(CARD_TEMPLATE)
+            missing[key] = card_template.render({'post': post})
+    if missing:
+        cache.set_many(missing, timeout=settings.POST_CARD_CACHE_TIMEOUT)
+        cards.update(missing)
+    return [mark_safe(cards[key]) for key in keys]
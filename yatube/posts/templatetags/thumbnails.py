@@ -0,0 +1,18 @@
+from django import template
+from django.conf import settings
+
+from posts.thumbnails import thumbnail_name
+
+register = template.Library()
+
+
+@register.filter
+def thumbnail_url(post, size_name):
+    """Адрес готовой миниатюры картинки поста, без чтения файлов.
+
+    Использование: ``{{ post|thumbnail_url:'card' }}``; для поста без
+    картинки - пустая строка.
+    """
+    if not post.image_hash:
+        return ''
+    return settings.MEDIA_URL + thumbnail_name(post.image_hash, size_name)
@@ -0,0 +1,105 @@
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Group, Post
+
+from .test_query_plans import FULL_SCAN
+
+User = get_user_model()
+
+
+class PostAdminChangelistTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def create_posts(self, count):
+        start = Group.objects.count()
+        for i in range(start, start + count):
+            group = Group.objects.create(
+                title=f'Группа {i}', slug=f'group_{i}', description='-')
+            Post.objects.create(
+                author=self.admin, group=group, text=f'Запись {i}')
+
+    def changelist_queries(self):
+        url = reverse('admin:posts_post_changelist')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return response, queries.captured_queries
+
+    def test_query_count_does_not_grow_with_rows(self):
+        """Число запросов списка постов не зависит от числа строк."""
+        self.create_posts(3)
+        _, few = self.changelist_queries()
+        self.create_posts(30)
+        response, many = self.changelist_queries()
+        self.assertEqual(len(response.context['cl'].result_list), 33)
+        self.assertEqual(len(few), len(many))
+
+    def test_changelist_does_not_count_whole_table(self):
+        """Без фильтров список берёт число постов из счётчика."""
+        self.create_posts(3)
+        response, queries = self.changelist_queries()
+        self.assertEqual(response.context['cl'].result_count, 3)
+        self.assertFalse([
+            query for query in queries
+            if 'COUNT(' in query['sql'] and 'posts_post' in query['sql']
+        ])
+
+    def test_group_select_renders_only_selected_group(self):
+        """В строке списка нет полного выпадающего списка всех групп."""
+        self.create_posts(5)
+        response, _ = self.changelist_queries()
+        before = response.content.decode().count('<option')
+        self.create_posts(5)
+        response, _ = self.changelist_queries()
+        after = response.content.decode().count('<option')
+        # пустой вариант и выбранная группа на каждую новую строку
+        self.assertEqual(after - before, 5 * 2)
+
+    def test_date_hierarchy_uses_index(self):
+        """Навигация по датам не сканирует таблицу и не считает DISTINCT."""
+        self.create_posts(4)
+        dates = [(2020, 1, 5), (2020, 3, 7), (2020, 3, 9), (2021, 6, 1)]
+        for post, date in zip(Post.objects.order_by('pk'), dates):
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=timezone.make_aware(datetime(*date, 12)))
+
+        url = reverse('admin:posts_post_changelist')
+        expected = {
+            '': ['2020', '2021'],
+            '?pub_date__year=2020': ['Январь 2020 г.', 'Март 2020 г.'],
+            '?pub_date__year=2020&pub_date__month=3': ['7 Март', '9 Март'],
+        }
+        for query, titles in expected.items():
+            with self.subTest(query=query):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url + query)
+                choices = [choice['title'] for choice in
+                           response.context['choices']]
+                self.assertEqual(choices, titles)
+                for captured in queries.captured_queries:
+                    sql = captured['sql']
+                    if 'posts_post' not in sql:
+                        continue
+                    self.assertNotIn('django_date_trunc', sql)
+                    with connection.cursor() as cursor:
+                        cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                        plan = '\n'.join(row[-1] for row in cursor.fetchall())
+                    self.assertNotIn('TEMP B-TREE', plan)
+                    self.assertIsNone(FULL_SCAN.search(plan), plan)
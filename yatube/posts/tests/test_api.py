@@ -0,0 +1,66 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class PostApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testuser')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание'
+        )
+        for i in range(12):
+            Post.objects.create(
+                author=cls.user, group=cls.group, text=f'Запись {i}')
+        cls.urls = (
+            reverse('posts:api_index'),
+            reverse('posts:api_group_list', kwargs={'slug': 'test_slug'}),
+            reverse('posts:api_profile', kwargs={'username': 'testuser'}),
+        )
+
+    def test_feeds_are_paginated(self):
+        """Ленты API отдают компактные записи и курсор продолжения."""
+        newest = Post.objects.get(text='Запись 11')
+        for url in self.urls:
+            with self.subTest(url=url):
+                data = self.client.get(url).json()
+                self.assertEqual(len(data['results']), 10)
+                self.assertEqual(data['results'][0], {
+                    'id': newest.pk,
+                    'text': 'Запись 11',
+                    'author': 'testuser',
+                    'group': 'test_slug',
+                    'pub_date': data['results'][0]['pub_date'],
+                })
+                rest = self.client.get(url + '?' + data['next']).json()
+                self.assertEqual(len(rest['results']), 2)
+                self.assertIsNone(rest['next'])
+
+    def test_unchanged_feed_answers_not_modified(self):
+        """Неизменная лента отвечает 304, правка поста меняет ETag."""
+        post = Post.objects.get(text='Запись 11')
+        detail_url = reverse(
+            'posts:api_post_detail', kwargs={'post_id': post.pk})
+        for url in self.urls + (detail_url,):
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED)
+
+        etag = self.client.get(detail_url)['ETag']
+        post.text = 'Исправлено'
+        post.save()
+        response = self.client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.json()['text'], 'Исправлено')
@@ -0,0 +1,199 @@
+import csv
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from posts.management.commands.bench_load import HEAVY, POST_ONLY
+from posts.models import Group, Post, PostCounter, TimelineEntry
+from posts.urls import urlpatterns
+
+User = get_user_model()
+
+
+class ImportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание'
+        )
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w', encoding='utf-8') as source:
+            source.write(content)
+        return path
+
+    def test_import_jsonl_keeps_dates_and_derived_data(self):
+        """Импорт сохраняет даты и ведёт счётчики, ленты и поиск."""
+        records = [
+            {'text': f'Запись {i}', 'author': 'author', 'group': 'test_slug',
+             'pub_date': f'2020-01-0{i + 1}T10:00:00+00:00'}
+            for i in range(5)
+        ]
+        records.append({'text': 'Чужая', 'author': 'nobody'})
+        path = self.write('posts.jsonl', '\n'.join(
+            json.dumps(record, ensure_ascii=False) for record in records))
+        call_command('import_posts', path, batch_size=2,
+                     stdout=StringIO(), stderr=StringIO())
+
+        self.assertEqual(Post.objects.count(), 5)
+        self.assertEqual(
+            Post.objects.order_by('pub_date').first().pub_date.day, 1)
+        self.assertEqual(PostCounter.get_value(
+            PostCounter.group_key(self.group.pk)), 5)
+        self.assertEqual(TimelineEntry.objects.filter(
+            feed_key=TimelineEntry.ALL).count(), 5)
+        self.assertEqual(
+            set(TimelineEntry.objects.values_list('post_id', flat=True)),
+            set(Post.objects.values_list('pk', flat=True))
+        )
+
+    def test_import_skips_records_with_wrong_types(self):
+        """Поля не строкой пропускают запись, а не обрывают импорт."""
+        records = [
+            {'text': 'Запись', 'author': ['author']},
+            {'text': {'a': 1}, 'author': 'author'},
+            {'text': 'Запись', 'author': 'author', 'group': 1},
+            {'text': 'Запись', 'author': 'author', 'pub_date': 20200101},
+            {'text': 'Целая', 'author': 'author', 'group': None},
+        ]
+        path = self.write('posts.jsonl', '\n'.join(
+            json.dumps(record, ensure_ascii=False) for record in records))
+        stderr = StringIO()
+        call_command('import_posts', path, stdout=StringIO(), stderr=stderr)
+
+        self.assertEqual(
+            list(Post.objects.values_list('text', flat=True)), ['Целая'])
+        self.assertEqual(stderr.getvalue().count('пропущена'), 4)
+
+    def test_import_csv_resumes_from_checkpoint(self):
+        """С --resume импорт продолжается с контрольной точки."""
+        path = self.write('posts.csv', 'text,author,group\n' + ''.join(
+            f'Запись {i},writer,new_group\n' for i in range(4)))
+        checkpoint = os.path.join(self.tmp.name, 'import.json')
+        with open(checkpoint, 'w') as state:
+            json.dump({'position': 3}, state)
+        call_command('import_posts', path, checkpoint=checkpoint,
+                     resume=True, create_missing=True, stdout=StringIO())
+
+        self.assertEqual(
+            list(Post.objects.values_list('text', flat=True)), ['Запись 3'])
+        self.assertTrue(Group.objects.filter(slug='new_group').exists())
+        with open(checkpoint) as state:
+            self.assertEqual(json.load(state)['position'], 4)
+
+
+class ExportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание'
+        )
+        for i in range(5):
+            Post.objects.create(
+                author=cls.user, group=cls.group, text=f'Запись, {i}')
+        Post.objects.create(author=cls.user, text='Без группы')
+
+    def test_profile_export_streams_jsonl(self):
+        """Выгрузка профиля отдаётся потоком JSONL по возрастанию id."""
+        response = self.client.get(
+            reverse('posts:profile_export', kwargs={'username': 'author'}))
+        self.assertTrue(response.streaming)
+        records = [json.loads(line) for line in b''.join(
+            response.streaming_content).decode().splitlines()]
+        self.assertEqual(
+            [record['id'] for record in records],
+            list(Post.objects.order_by('pk').values_list('pk', flat=True))
+        )
+        self.assertEqual(records[0]['group'], 'test_slug')
+
+    def test_group_export_streams_csv(self):
+        """Выгрузка группы отдаётся потоком CSV с заголовком."""
+        response = self.client.get(
+            reverse('posts:group_export', kwargs={'slug': 'test_slug'}))
+        rows = list(csv.DictReader(StringIO(
+            b''.join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['text'], 'Запись, 0')
+
+    def test_export_command_output_can_be_imported(self):
+        """Выгрузка export_posts загружается обратно через import_posts."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'posts.jsonl')
+            call_command('export_posts', author='author', output=path,
+                         chunk_size=2)
+            Post.objects.all().delete()
+            call_command('import_posts', path, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 6)
+        self.assertEqual(Post.objects.filter(group=self.group).count(), 5)
+
+
+class SeedDataTest(TestCase):
+    def test_seed_is_skewed_and_keeps_derived_data(self):
+        """Посты распределены с перекосом, счётчики и ленты сходятся."""
+        call_command('seed_data', users=20, groups=5, posts=500,
+                     batch_size=200, stdout=StringIO())
+
+        self.assertEqual(Post.objects.count(), 500)
+        self.assertEqual(PostCounter.get_value(PostCounter.TOTAL), 500)
+        self.assertEqual(
+            TimelineEntry.objects.filter(feed_key=TimelineEntry.ALL).count(),
+            500)
+        per_author = sorted(
+            (user.posts.count() for user in User.objects.all()),
+            reverse=True)
+        self.assertGreater(per_author[0], 5 * per_author[len(per_author) // 2])
+
+
+class BenchLoadTest(TransactionTestCase):
+    # потоки бенчмарка ходят в базу своими соединениями и видят только
+    # закоммиченные данные
+    def setUp(self):
+        author = User.objects.create_user(username='bench')
+        group = Group.objects.create(title='Группа', slug='bench')
+        for number in range(3):
+            Post.objects.create(
+                text=f'Запись {number}', author=author, group=group)
+
+    def test_bench_covers_all_get_urls(self):
+        """Бенчмарк обходит все GET url без ошибок."""
+        out = StringIO()
+        call_command('bench_load', threads=1, requests=2, warmup=0,
+                     stdout=out)
+
+        report = json.loads(out.getvalue())
+        expected = {pattern.name for pattern in urlpatterns} - set(
+            HEAVY + POST_ONLY)
+        self.assertEqual(set(report['urls']), expected)
+        for name, result in report['urls'].items():
+            with self.subTest(name=name):
+                self.assertEqual(result['requests'], 2)
+                self.assertEqual(result['errors'], 0)
+
+    def test_bench_without_requests(self):
+        """С --requests 0 отчёт строится без задержек."""
+        out = StringIO()
+        call_command('bench_load', threads=2, requests=0, warmup=0,
+                     urls=['index'], stdout=out)
+
+        result = json.loads(out.getvalue())['urls']['index']
+        self.assertEqual(result['requests'], 0)
+        self.assertIsNone(result['p99_ms'])
@@ -0,0 +1,153 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.bulk import bulk_create_posts
+from posts.follow import follow
+from posts.models import Follow, Group, Post, TimelineEntry
+
+User = get_user_model()
+
+
+@override_settings(COUNT_INDEX_POSTS=3)
+class FollowFeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.other_reader = User.objects.create_user(username='other')
+        cls.author = User.objects.create_user(username='author')
+        cls.star = User.objects.create_user(username='star')
+        cls.old_post = Post.objects.create(
+            author=cls.author, text='Старая запись')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def feed(self):
+        """Все посты ленты подписок, пролистанные до конца."""
+
+        pks = []
+        response = self.client.get(reverse('posts:follow_index'))
+        while True:
+            page_obj = response.context['page_obj']
+            pks.extend(post.pk for post in page_obj)
+            if not page_obj.has_next():
+                return pks
+            response = self.client.get(
+                reverse('posts:follow_index') + '?'
+                + page_obj.next_page_query)
+
+    def newest_first(self, authors):
+        return list(Post.objects.filter(author__in=authors).order_by(
+            '-pub_date', '-pk').values_list('pk', flat=True))
+
+    def test_follow_and_unfollow(self):
+        """Подписка приносит в ленту старые и новые посты автора."""
+
+        response = self.client.post(
+            reverse('posts:profile_follow', args=['author']))
+        self.assertRedirects(
+            response, reverse('posts:profile', args=['author']))
+        new_post = Post.objects.create(author=self.author, text='Новая')
+        self.assertEqual(self.feed(), [new_post.pk, self.old_post.pk])
+
+        self.client.post(reverse('posts:profile_unfollow', args=['author']))
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(self.feed(), [])
+
+    def test_moved_post_stays_in_follow_feed(self):
+        """Перенос поста в другую группу не убирает его из ленты
+        подписчиков."""
+
+        first = Group.objects.create(title='Первая', slug='first')
+        second = Group.objects.create(title='Вторая', slug='second')
+        follow(self.reader, self.author)
+        post = Post.objects.create(
+            author=self.author, group=first, text='Запись в группе')
+        post = Post.objects.get(pk=post.pk)
+        post.group = second
+        post.save()
+        self.assertEqual(set(post.timeline_entries.values_list(
+            'feed_key', flat=True)), {
+            TimelineEntry.ALL, TimelineEntry.group_key(second.pk),
+            TimelineEntry.follow_key(self.reader.pk)})
+        self.assertEqual(self.feed(), [post.pk, self.old_post.pk])
+
+    @override_settings(FOLLOW_FANOUT_MAX_POSTS=2)
+    def test_author_with_many_posts_is_merged_on_read(self):
+        """Подписка на автора с множеством постов не копирует их
+        в ленту, а читает слиянием."""
+
+        bulk_create_posts(
+            Post(author=self.author, text=f'Запись {i}') for i in range(2))
+        follow(self.reader, self.author)
+        self.assertTrue(Follow.objects.get().merge_on_read)
+        self.assertFalse(TimelineEntry.objects.filter(
+            feed_key=TimelineEntry.follow_key(self.reader.pk)).exists())
+        self.assertEqual(self.feed(), self.newest_first([self.author]))
+
+    def test_follow_needs_post_and_other_author(self):
+        url = reverse('posts:profile_follow', args=['reader'])
+        self.assertEqual(self.client.get(url).status_code, 405)
+        self.client.post(url)
+        self.assertFalse(Follow.objects.exists())
+
+    @override_settings(FOLLOW_FANOUT_MAX_FOLLOWERS=1)
+    def test_prolific_author_is_merged_on_read(self):
+        """Посты автора с множеством подписчиков не раскладываются
+        по лентам, но в ленте идут по порядку вместе с остальными."""
+
+        follow(self.reader, self.author)
+        follow(self.reader, self.star)
+        follow(self.other_reader, self.star)
+        self.assertTrue(all(Follow.objects.filter(
+            author=self.star).values_list('merge_on_read', flat=True)))
+        bulk_create_posts(
+            Post(author=author, text=f'Запись {i}')
+            for i in range(5) for author in (self.author, self.star))
+        self.assertFalse(TimelineEntry.objects.filter(
+            feed_key__startswith='follow:', post__author=self.star).exists())
+        self.assertEqual(
+            self.feed(), self.newest_first([self.author, self.star]))
+
+    def test_feed_queries_do_not_depend_on_follows(self):
+        follow(self.reader, self.author)
+        # первый запрос кладёт пользователя сессии в кэш
+        self.client.get(reverse('posts:follow_index'))
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(reverse('posts:follow_index'))
+        for i in range(20):
+            author = User.objects.create_user(username=f'author{i}')
+            Post.objects.create(author=author, text='Запись')
+            follow(self.reader, author)
+        with CaptureQueriesContext(connection) as many:
+            self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(len(few), len(many))
+
+    def test_rebuild_timeline_keeps_follow_feeds(self):
+        follow(self.reader, self.author)
+        call_command('rebuild_timeline', stdout=StringIO())
+        self.assertEqual(self.feed(), [self.old_post.pk])
+
+    def test_cached_profile_shows_own_follow_button(self):
+        """Кнопка подписки своя у каждого, хотя страница профиля
+        берётся из общего кэша."""
+
+        follow(self.other_reader, self.author)
+        url = reverse('posts:profile', args=['author'])
+        self.assertContains(self.client.get(url), 'Подписаться')
+        other = Client()
+        other.force_login(self.other_reader)
+        with self.assertTemplateNotUsed('posts/profile.html'):
+            response = other.get(url)
+        self.assertContains(response, 'Отписаться')
+        self.assertNotContains(Client().get(url), 'Подписаться')
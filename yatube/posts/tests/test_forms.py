@@ -2,6 +2,7 @@ from posts.models import Post, Group
 from django.test import Client, TestCase
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 
 User = get_user_model()
 
@@ -18,6 +19,7 @@ class PostCreateFormTests(TestCase):
         )
 
     def setUp(self):
+        cache.clear()
         self.user = User.objects.create_user(username='testuser')
         self.guest_client = Client()
         self.authorized_client = Client()
@@ -1,7 +1,13 @@
+from datetime import timedelta
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
 
-from ..models import Group, Post
+from ..bulk import bulk_create_posts
+from ..models import Group, Post, PostCounter, TimelineEntry
 
 User = get_user_model()
 
@@ -28,3 +34,151 @@ class PostModelTest(TestCase):
 
         group = PostModelTest.group
         self.assertEqual(group.title, str(group))
+
+
+class PostCounterTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other_slug',
+            description='Тестовое описание',
+        )
+
+    def assertCounters(self, total, author, group, other_group):
+        self.assertEqual(
+            (
+                PostCounter.get_value(PostCounter.TOTAL),
+                PostCounter.get_value(PostCounter.author_key(self.user.pk)),
+                PostCounter.get_value(PostCounter.group_key(self.group.pk)),
+                PostCounter.get_value(
+                    PostCounter.group_key(self.other_group.pk)),
+            ),
+            (total, author, group, other_group)
+        )
+
+    def test_counters_follow_post_changes(self):
+        """Счётчики меняются при создании, переносе и удалении поста."""
+        post = Post.objects.create(
+            author=self.user, text='Запись', group=self.group)
+        Post.objects.create(author=self.user, text='Без группы')
+        self.assertCounters(2, 2, 1, 0)
+
+        post = Post.objects.get(pk=post.pk)
+        post.group = self.other_group
+        post.save()
+        self.assertCounters(2, 2, 0, 1)
+
+        post.delete()
+        self.assertCounters(1, 1, 0, 0)
+
+    def test_recount_posts_command(self):
+        """recount_posts восстанавливает счётчики после bulk_create."""
+        Post.objects.bulk_create([
+            Post(author=self.user, text='Запись', group=self.group)
+            for _ in range(3)
+        ])
+        self.assertCounters(0, 0, 0, 0)
+        call_command('recount_posts', stdout=StringIO())
+        self.assertCounters(3, 3, 3, 0)
+
+
+class TimelineEntryTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other_slug',
+            description='Тестовое описание',
+        )
+
+    def feed_keys(self, post):
+        return set(post.timeline_entries.values_list('feed_key', flat=True))
+
+    def test_timeline_follows_post_changes(self):
+        """Пост попадает в ленты, переезжает между группами и удаляется."""
+        post = Post.objects.create(
+            author=self.user, text='Запись', group=self.group)
+        self.assertEqual(self.feed_keys(post), {
+            TimelineEntry.ALL, TimelineEntry.group_key(self.group.pk)})
+
+        post = Post.objects.get(pk=post.pk)
+        post.group = self.other_group
+        post.save()
+        self.assertEqual(self.feed_keys(post), {
+            TimelineEntry.ALL, TimelineEntry.group_key(self.other_group.pk)})
+
+        post.delete()
+        self.assertFalse(TimelineEntry.objects.exists())
+
+    def test_rebuild_timeline_command(self):
+        """rebuild_timeline заполняет ленты для постов из bulk_create."""
+        Post.objects.bulk_create([
+            Post(author=self.user, text='Запись', group=self.group)
+            for _ in range(3)
+        ])
+        call_command('rebuild_timeline', chunk_size=2, stdout=StringIO())
+        self.assertEqual(
+            TimelineEntry.objects.filter(feed_key=TimelineEntry.ALL).count(),
+            3
+        )
+        self.assertEqual(
+            TimelineEntry.objects.filter(
+                feed_key=TimelineEntry.group_key(self.group.pk)).count(),
+            3
+        )
+
+    def test_rebuild_timeline_fixes_feeds_in_place(self):
+        """Перестройка не стирает живые ленты, убирает лишние строки и
+        не дублирует посты, записанные сигналом во время перестройки."""
+        post = Post.objects.create(
+            author=self.user, text='Запись', group=self.group)
+        kept = set(TimelineEntry.objects.values_list('pk', flat=True))
+        TimelineEntry.objects.create(
+            feed_key=TimelineEntry.group_key(self.other_group.pk),
+            pub_date=post.pub_date, post=post)
+        user = self.user
+
+        class SaveDuringRebuild(StringIO):
+            def write(self, text):
+                if Post.objects.count() == 1:
+                    Post.objects.create(author=user, text='Новая')
+                return super().write(text)
+
+        call_command('rebuild_timeline', chunk_size=1,
+                     stdout=SaveDuringRebuild())
+        self.assertTrue(kept <= set(
+            TimelineEntry.objects.values_list('pk', flat=True)))
+        self.assertEqual(self.feed_keys(post), {
+            TimelineEntry.ALL, TimelineEntry.group_key(self.group.pk)})
+        self.assertEqual(
+            TimelineEntry.objects.filter(feed_key=TimelineEntry.ALL).count(),
+            2)
+
+    def test_bulk_create_keeps_dates(self):
+        """Исходные даты попадают и в посты, и в ленты, а модель
+        по-прежнему ставит текущее время постам без даты."""
+        pub_date = timezone.now() - timedelta(days=30)
+        old, new = bulk_create_posts([
+            Post(author=self.user, text='Старая', pub_date=pub_date),
+            Post(author=self.user, text='Новая'),
+        ], keep_dates=True)
+        self.assertEqual(Post.objects.get(pk=old.pk).pub_date, pub_date)
+        self.assertEqual(
+            old.timeline_entries.get().pub_date, pub_date)
+        self.assertGreater(Post.objects.get(pk=new.pk).pub_date, pub_date)
+        self.assertTrue(Post._meta.get_field('pub_date').auto_now_add)
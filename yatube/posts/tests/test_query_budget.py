@@ -0,0 +1,124 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import follow
+from posts.bulk import bulk_create_posts
+from posts.models import Group, Post, User
+from posts.urls import urlpatterns
+
+# размеры страницы, на которых число запросов должно совпадать
+PAGE_SIZES = (1, 10, 100)
+
+# (имя url, kwargs, GET-параметры, клиент, предельное число запросов)
+BUDGETS = (
+    ('posts:index', {}, {}, 'guest', 4),
+    ('posts:group_index', {}, {}, 'guest', 3),
+    ('posts:group_list', {'slug': 'test_slug'}, {}, 'guest', 6),
+    ('posts:group_export', {'slug': 'test_slug'}, {}, 'guest', 3),
+    ('posts:profile', {'username': 'author'}, {}, 'guest', 5),
+    ('posts:profile_export', {'username': 'author'}, {}, 'guest', 3),
+    ('posts:follow_index', {}, {}, 'author', 3),
+    ('posts:search', {}, {'q': 'запись'}, 'guest', 3),
+    ('posts:post_detail', {'post_id': 'last'}, {}, 'guest', 4),
+    ('posts:post_create', {}, {}, 'author', 3),
+    ('posts:post_edit', {'post_id': 'last'}, {}, 'author', 4),
+    ('posts:api_index', {}, {}, 'guest', 2),
+    ('posts:api_group_list', {'slug': 'test_slug'}, {}, 'guest', 3),
+    ('posts:api_profile', {'username': 'author'}, {}, 'guest', 2),
+    ('posts:api_post_detail', {'post_id': 'last'}, {}, 'guest', 1),
+    ('users:signup', {}, {}, 'guest', 0),
+    ('users:login', {}, {}, 'guest', 0),
+    ('users:logout', {}, {}, 'author', 4),
+    ('users:password_change', {}, {}, 'author', 2),
+    ('users:password_change_done', {}, {}, 'author', 2),
+    ('about:author', {}, {}, 'guest', 0),
+    ('about:tech', {}, {}, 'guest', 0),
+)
+# url только для POST, запросы от читателя автора:
+# (имя url, kwargs, подписан ли читатель до запроса, предел запросов)
+POST_BUDGETS = (
+    ('posts:profile_follow', {'username': 'author'}, False, 15),
+    ('posts:profile_unfollow', {'username': 'author'}, True, 8),
+)
+
+
+class QueryBudgetTest(TestCase):
+    """Число запросов каждой страницы ограничено и не растёт
+    с числом постов на странице."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        bulk_create_posts(
+            Post(author=cls.author, group=cls.group, text=f'Запись {i}')
+            for i in range(max(PAGE_SIZES))
+        )
+        cls.last_post = Post.objects.latest('pk')
+
+    def setUp(self):
+        cache.clear()
+
+    def count_queries(self, name, kwargs, params, client_name):
+        kwargs = {key: self.last_post.pk if value == 'last' else value
+                  for key, value in kwargs.items()}
+        client = Client()
+        if client_name == 'author':
+            client.force_login(self.author)
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse(name, kwargs=kwargs), params)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertIn(response.status_code, (200, 302))
+        return len(queries)
+
+    def test_query_budgets(self):
+        for name, kwargs, params, client_name, budget in BUDGETS:
+            counts = []
+            for size in PAGE_SIZES:
+                with override_settings(COUNT_INDEX_POSTS=size):
+                    counts.append(self.count_queries(
+                        name, kwargs, params, client_name))
+            with self.subTest(url=name):
+                self.assertLessEqual(max(counts), budget)
+                self.assertEqual(
+                    len(set(counts)), 1,
+                    f'{name}: число запросов зависит от размера '
+                    f'страницы: {dict(zip(PAGE_SIZES, counts))}')
+
+    def test_post_query_budgets(self):
+        client = Client()
+        client.force_login(self.reader)
+        for name, kwargs, following, budget in POST_BUDGETS:
+            counts = []
+            # первый запрос прогревает кэш пользователя и строки счётчиков
+            for _ in range(3):
+                if following:
+                    follow.follow(self.reader, self.author)
+                else:
+                    follow.unfollow(self.reader, self.author)
+                cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    response = client.post(reverse(name, kwargs=kwargs))
+                self.assertEqual(response.status_code, 302)
+                counts.append(len(queries))
+            with self.subTest(url=name):
+                self.assertLessEqual(max(counts[1:]), budget)
+                self.assertEqual(len(set(counts[1:])), 1)
+
+    def test_every_url_has_budget(self):
+        """У каждого url из posts.urls есть предел запросов."""
+        budgeted = {name for name, *_ in BUDGETS + POST_BUDGETS}
+        missing = {f'posts:{pattern.name}' for pattern in urlpatterns}
+        missing -= budgeted
+        self.assertFalse(missing, f'нет предела запросов: {missing}')
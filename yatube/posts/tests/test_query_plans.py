@@ -0,0 +1,65 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+# полный проход по таблице постов или лент без индекса
+FULL_SCAN = re.compile(
+    r'SCAN (TABLE )?posts_(post|timelineentry)\b(?! USING)')
+FEED_TABLES = ('FROM "posts_post"', 'FROM "posts_timelineentry"')
+
+
+@override_settings(PAGINATOR_NUMBERED_PAGES=1)
+class FeedQueryPlanTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testuser')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание'
+        )
+        for i in range(15):
+            Post.objects.create(
+                author=cls.user, group=cls.group, text=f'Запись {i}')
+
+    def setUp(self):
+        cache.clear()
+
+    def feed_queries(self, url):
+        """SQL всех выборок постов для первой и курсорных страниц ленты."""
+        with CaptureQueriesContext(connection) as queries:
+            page = self.client.get(url).context['page_obj']
+            page = self.client.get(
+                url + '?' + page.next_page_query).context['page_obj']
+            self.client.get(url + '?' + page.previous_page_query)
+        return [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT')
+            and any(table in query['sql'] for table in FEED_TABLES)
+        ]
+
+    def test_feeds_use_indexes(self):
+        """Ленты читаются по индексу, без сортировки во временном B-tree."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test_slug'}),
+            reverse('posts:profile', kwargs={'username': 'testuser'}),
+        )
+        for url in urls:
+            for sql in self.feed_queries(url):
+                with self.subTest(url=url, sql=sql):
+                    with connection.cursor() as cursor:
+                        cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                        plan = '\n'.join(row[-1] for row in cursor.fetchall())
+                    self.assertNotIn('TEMP B-TREE', plan)
+                    self.assertIsNone(FULL_SCAN.search(plan), plan)
@@ -0,0 +1,101 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import search
+from posts.models import Post
+
+User = get_user_model()
+
+
+class PostSearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testuser')
+        cls.apple = Post.objects.create(
+            author=cls.user, text='Яблоки созрели, яблоки в саду')
+        cls.pear = Post.objects.create(
+            author=cls.user, text='Груши и одно яблоко')
+
+    def setUp(self):
+        cache.clear()
+
+    def search(self, query, page=1):
+        response = self.client.get(
+            reverse('posts:search'), {'q': query, 'page': page})
+        return [post.pk for post in response.context['page_obj']]
+
+    def test_search_is_ranked(self):
+        """Поиск находит посты по началу слова и ранжирует по bm25."""
+        self.assertEqual(self.search('ябло'), [self.apple.pk, self.pear.pk])
+        self.assertEqual(self.search('груши'), [self.pear.pk])
+
+    def test_search_follows_edits_and_deletes(self):
+        """Индекс обновляется при правке и удалении поста."""
+        pear = Post.objects.get(pk=self.pear.pk)
+        pear.text = 'Сливы'
+        pear.save()
+        self.assertEqual(self.search('груши'), [])
+        self.assertEqual(self.search('сливы'), [pear.pk])
+        pear.delete()
+        self.assertEqual(self.search('сливы'), [])
+
+    def test_search_syntax_is_escaped(self):
+        """Операторы FTS5 во вводе не ломают запрос."""
+        for query in ('"', 'ябло* OR', 'NEAR(', '***'):
+            with self.subTest(query=query):
+                response = self.client.get(
+                    reverse('posts:search'), {'q': query})
+                self.assertEqual(response.status_code, 200)
+
+    def test_build_search_index_command(self):
+        """build_search_index индексирует посты из bulk_create."""
+        Post.objects.bulk_create(
+            [Post(author=self.user, text=f'Вишня {i}') for i in range(3)])
+        self.assertEqual(self.search('вишня'), [])
+        call_command('build_search_index', chunk_size=2, stdout=StringIO())
+        self.assertEqual(len(self.search('вишня')), 3)
+        self.assertEqual(len(self.search('ябло')), 2)
+
+    def test_rebuild_keeps_rows_indexed_by_signals(self):
+        """Пост, сохранённый во время перестройки, не ломает её, а строки
+        удалённых постов уходят из индекса."""
+        user = self.user
+
+        class SaveDuringRebuild(StringIO):
+            def write(self, text):
+                if not Post.objects.filter(text='Слива').exists():
+                    Post.objects.create(author=user, text='Слива')
+                return super().write(text)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {search.FTS_TABLE} (rowid, text) '
+                f'VALUES (%s, %s)', [10 ** 6, 'Слива удалённая'])
+        call_command('build_search_index', chunk_size=1,
+                     stdout=SaveDuringRebuild())
+        self.assertEqual(len(self.search('слива')), 1)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM {search.FTS_TABLE} WHERE rowid = %s',
+                [10 ** 6])
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке идёт через индекс FTS5."""
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+        client = Client()
+        client.force_login(admin)
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'груши'})
+        self.assertEqual(
+            [post.pk for post in response.context['cl'].result_list],
+            [self.pear.pk]
+        )
@@ -0,0 +1,82 @@
+import io
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts import thumbnails
+from posts.models import Post, User
+from posts.templatetags.thumbnails import thumbnail_url
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def image_bytes(size=(40, 30), color='red'):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ThumbnailTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testuser')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_uploaded_image_gets_thumbnails(self):
+        """Картинка из формы хэшируется, миниатюры строятся заранее."""
+
+        response = self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={
+                'text': 'Запись с картинкой',
+                'image': SimpleUploadedFile(
+                    'small.png', image_bytes(), content_type='image/png'),
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        post = Post.objects.get()
+        self.assertEqual(len(post.image_hash), 40)
+        # в TestCase on_commit не срабатывает: ставим задания вручную
+        thumbnails.schedule(post)
+        for size_name in ('card', 'detail'):
+            name = thumbnails.thumbnail_name(post.image_hash, size_name)
+            with Image.open(os.path.join(MEDIA_ROOT, name)) as thumb:
+                self.assertEqual(
+                    thumb.size, settings.THUMBNAIL_SIZES[size_name])
+
+        with mock.patch('PIL.Image.open', side_effect=AssertionError):
+            response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, thumbnail_url(post, 'card'))
+
+    def test_command_fills_missing_hashes(self):
+        """Команда заполняет хэш у постов без него и строит миниатюры."""
+
+        post = Post.objects.create(author=self.user, text='Импорт')
+        post.image.save('imported.png', ContentFile(image_bytes()))
+        Post.objects.filter(pk=post.pk).update(image_hash='')
+        call_command('generate_thumbnails', workers=0, stdout=io.StringIO())
+
+        post.refresh_from_db()
+        self.assertEqual(len(post.image_hash), 40)
+        self.assertEqual(thumbnails.missing_jobs(post), [])
@@ -1,6 +1,7 @@
 from http import HTTPStatus
 from django.test import TestCase, Client
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from posts.models import Post, Group
 
 User = get_user_model()
@@ -35,6 +36,7 @@ class PostURLTests(TestCase):
         )
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
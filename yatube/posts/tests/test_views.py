@@ -1,9 +1,21 @@
+from datetime import timedelta
+from io import StringIO
+
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.management import call_command
+from django.core.cache import cache
+from django.db import connection
+from django.template import Context, Template
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from django import forms
+from posts.bulk import bulk_create_posts
+from posts.checks import check_page_cache
 from posts.forms import PostForm
-from posts.models import Post, Group
+from posts.models import Post, Group, GroupStats
+from posts.utils import encode_cursor
 
 User = get_user_model()
 
@@ -27,6 +39,7 @@ class GroupPagesTests(TestCase):
         )
 
     def setUp(self):
+        cache.clear()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
 
@@ -197,6 +210,8 @@ class PaginatorViewsTest(TestCase):
             group=cls.group,
         ) for i in range(13)]
         Post.objects.bulk_create(list_posts)
+        # bulk_create не шлёт сигналов, ленты заполняем командой
+        call_command('rebuild_timeline', stdout=StringIO())
 
     # список шаблонов для проверки работы paginator
         cls.list_template_names = {
@@ -205,6 +220,9 @@ class PaginatorViewsTest(TestCase):
             reverse('posts:profile', kwargs={'username': 'testuser'}),
         }
 
+    def setUp(self):
+        cache.clear()
+
     def test_first_page_contains_ten_records(self):
         """ тестируем работу Paginator. Проверка вывода 10 записей"""
 
@@ -229,3 +247,332 @@ class PaginatorViewsTest(TestCase):
                     len(response.context['page_obj']),
                     num_posts_on_second_page
                 )
+
+
+class FeedPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testuser')
+        Post.objects.bulk_create([Post(
+            text=f'Текст для проверки {i}',
+            author=cls.user,
+        ) for i in range(25)])
+        call_command('rebuild_timeline', stdout=StringIO())
+        cls.ordered_ids = list(
+            Post.objects.order_by('-pub_date', '-pk').values_list(
+                'pk', flat=True))
+
+    def setUp(self):
+        cache.clear()
+
+    def get_feed_page(self, query):
+        response = self.client.get(reverse('posts:index') + '?' + query)
+        return response.context['page_obj']
+
+    @override_settings(PAGINATOR_NUMBERED_PAGES=1)
+    def test_cursor_walks_whole_feed(self):
+        """Курсоры next/prev обходят ленту без пропусков и повторов."""
+
+        page = self.get_feed_page('page=1')
+        seen = [post.pk for post in page]
+        while page.has_next():
+            page = self.get_feed_page(page.next_page_query)
+            self.assertIsNone(page.number)
+            seen.extend(post.pk for post in page)
+        self.assertEqual(seen, self.ordered_ids)
+
+        back = self.get_feed_page(page.previous_page_query)
+        self.assertEqual([post.pk for post in back], self.ordered_ids[10:20])
+
+    def test_feed_page_does_not_count_rows(self):
+        """Страница ленты не выполняет COUNT(*)."""
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('posts:index') + '?page=2')
+        self.assertFalse(
+            [q for q in queries.captured_queries if 'COUNT(' in q['sql']])
+
+    def test_broken_cursor_falls_back_to_first_page(self):
+        """Испорченный курсор отдаёт первую страницу."""
+
+        overflow = encode_cursor('next', timezone.now(), 10 ** 30)
+        for cursor in ('garbage', overflow):
+            with self.subTest(cursor=cursor):
+                page = self.get_feed_page(f'cursor={cursor}')
+                self.assertEqual(page.number, 1)
+                self.assertEqual(
+                    [post.pk for post in page], self.ordered_ids[:10])
+        for url in (reverse('posts:profile', args=[self.user.username]),
+                    reverse('posts:api_index')):
+            with self.subTest(url=url):
+                response = self.client.get(url, {'cursor': overflow})
+                self.assertEqual(response.status_code, 200)
+
+
+class FeedPageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testuser')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Первая запись', group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_cached_page_is_shared_and_keeps_own_header(self):
+        """Гость и пользователь делят запись кэша, шапка у каждого своя."""
+
+        url = reverse('posts:index')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            guest = self.client.get(url)
+        # остаётся только чтение счётчиков для ETag и Last-Modified
+        self.assertEqual(len(queries), 1)
+        self.assertTemplateNotUsed(guest, 'posts/index.html')
+        self.assertContains(guest, 'Первая запись')
+        self.assertContains(guest, 'Регистрация')
+
+        user = self.authorized_client.get(url)
+        self.assertTemplateNotUsed(user, 'posts/index.html')
+        self.assertContains(user, 'Выйти')
+        self.assertNotContains(user, 'Регистрация')
+
+    def test_post_changes_invalidate_pages(self):
+        """Новый пост и правка группы сбрасывают закэшированные страницы."""
+
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test_slug'}),
+            reverse('posts:profile', kwargs={'username': 'testuser'}),
+        )
+        for url in urls:
+            self.client.get(url)
+        Post.objects.create(
+            author=self.user, text='Свежая запись', group=self.group)
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'Свежая запись')
+
+        self.group.slug = 'new_slug'
+        self.group.save()
+        response = self.client.get(urls[0])
+        self.assertContains(response, '/group/new_slug/')
+        response = self.client.get(urls[1])
+        self.assertEqual(response.status_code, 404)
+
+    def test_process_local_cache_is_rejected(self):
+        """Кэш страниц в памяти процесса не проходит проверку."""
+
+        self.assertEqual(check_page_cache(None), [])
+        locmem = {'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        with self.settings(CACHES=locmem):
+            errors = check_page_cache(None)
+        self.assertEqual([error.id for error in errors], ['posts.E001'])
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testuser')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Первая запись', group=cls.group)
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test_slug'}),
+            reverse('posts:profile', kwargs={'username': 'testuser'}),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.pk}),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def revalidate(self, url, response):
+        return self.client.get(
+            url,
+            HTTP_IF_NONE_MATCH=response['ETag'],
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+
+    def test_unchanged_pages_are_not_rendered(self):
+        """Повторный запрос без изменений получает 304 без рендеринга."""
+
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertIn('ETag', response)
+                self.assertIn('Last-Modified', response)
+                with self.assertTemplateNotUsed('includes/header.html'):
+                    repeated = self.revalidate(url, response)
+                self.assertEqual(repeated.status_code, 304)
+
+    def test_changes_and_pages_get_new_etag(self):
+        """Правка поста, другая страница и вход дают полный ответ."""
+
+        responses = {url: self.client.get(url) for url in self.urls}
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Исправленная запись'
+        post.save()
+        for url, response in responses.items():
+            with self.subTest(url=url):
+                self.assertEqual(self.revalidate(url, response).status_code,
+                                 200)
+
+        url = self.urls[0]
+        response = self.client.get(url)
+        other_page = self.client.get(
+            url + '?page=2', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(other_page.status_code, 200)
+        self.client.force_login(self.user)
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testuser')
+        cls.post = Post.objects.create(author=cls.user, text='Первая запись')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cards_are_cached_and_follow_edits(self):
+        """Карточка берётся из кэша и обновляется после правки поста."""
+
+        template = Template(
+            '{% load post_cards %}{% post_cards posts as cards %}'
+            '{% for card in cards %}{{ card }}{% endfor %}'
+        )
+        context = Context({'posts': [self.post]})
+        self.assertIn('Первая запись', template.render(context))
+        with self.assertTemplateNotUsed('includes/posts_card.html'):
+            template.render(context)
+
+        self.post.text = 'Исправленная запись'
+        self.post.save()
+        self.assertIn('Исправленная запись', template.render(context))
+
+    def test_author_rename_refreshes_cards_and_pages(self):
+        """Новое имя автора видно в карточках, кэше страниц и ETag."""
+
+        template = Template(
+            '{% load post_cards %}{% post_cards posts as cards %}'
+            '{% for card in cards %}{{ card }}{% endfor %}'
+        )
+        context = Context({'posts': [self.post]})
+        template.render(context)
+        url = reverse('posts:index')
+        etag = self.client.get(url)['ETag']
+
+        self.user.first_name = 'Новое'
+        self.user.last_name = 'Имя'
+        self.user.save()
+        self.assertIn('Новое Имя', template.render(context))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Новое Имя')
+
+    def test_author_rename_drops_old_profile(self):
+        """Профиль по старому имени не отдаётся из кэша."""
+
+        old_url = reverse('posts:profile', kwargs={'username': 'testuser'})
+        self.assertEqual(self.client.get(old_url).status_code, 200)
+
+        user = User.objects.get(pk=self.user.pk)
+        user.username = 'renamed'
+        user.save()
+        self.assertEqual(self.client.get(old_url).status_code, 404)
+        new_url = reverse('posts:profile', kwargs={'username': 'renamed'})
+        self.assertContains(self.client.get(new_url), 'Первая запись')
+
+    def test_login_keeps_cards(self):
+        template = Template(
+            '{% load post_cards %}{% post_cards posts as cards %}'
+            '{% for card in cards %}{{ card }}{% endfor %}'
+        )
+        context = Context({'posts': [self.post]})
+        template.render(context)
+        self.client.force_login(self.user)
+        with self.assertTemplateNotUsed('includes/posts_card.html'):
+            template.render(context)
+
+
+class GroupIndexTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testuser')
+        cls.active = Group.objects.create(
+            title='Активная', slug='active', description='')
+        cls.old = Group.objects.create(
+            title='Старая', slug='old', description='')
+        cls.empty = Group.objects.create(
+            title='Пустая', slug='empty', description='')
+        for i in range(3):
+            Post.objects.create(
+                author=cls.user, group=cls.active, text=f'Запись {i}')
+        bulk_create_posts([Post(
+            author=cls.user, group=cls.old, text='Давняя запись',
+            pub_date=timezone.now() - timedelta(days=10),
+        )], keep_dates=True)
+
+    def get_groups(self):
+        response = self.client.get(reverse('posts:group_index'))
+        return {group.slug: group for group in response.context['page_obj']}
+
+    def test_groups_page_shows_activity(self):
+        response = self.client.get(reverse('posts:group_index'))
+        groups = list(response.context['page_obj'])
+        self.assertEqual([group.slug for group in groups],
+                         ['active', 'old', 'empty'])
+        active, old, empty = groups
+        self.assertEqual(
+            (active.posts_count, active.stats.recent_posts), (3, 3))
+        self.assertEqual((old.posts_count, old.stats.recent_posts), (1, 0))
+        self.assertEqual(empty.posts_count, 0)
+        self.assertIsNone(empty.stats.last_post_at)
+
+    def test_stats_follow_post_changes(self):
+        post = Post.objects.filter(group=self.active).latest('pk')
+        post.group = self.empty
+        post.save()
+        groups = self.get_groups()
+        self.assertEqual(groups['active'].stats.recent_posts, 2)
+        self.assertEqual(groups['empty'].stats.recent_posts, 1)
+        self.assertEqual(groups['active'].stats.last_post_at,
+                         Post.objects.filter(group=self.active).latest(
+                             'pub_date').pub_date)
+        post.delete()
+        self.assertIsNone(self.get_groups()['empty'].stats.last_post_at)
+
+    def test_rebuild_matches_incremental_stats(self):
+        before = list(GroupStats.objects.order_by('pk').values())
+        call_command('rebuild_group_stats', stdout=StringIO())
+        self.assertEqual(
+            list(GroupStats.objects.order_by('pk').values()), before)
+
+    def test_query_count_does_not_depend_on_groups(self):
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(reverse('posts:group_index'))
+        Group.objects.bulk_create(
+            Group(title=f'Группа {i}', slug=f'group-{i}', description='')
+            for i in range(200))
+        with CaptureQueriesContext(connection) as many:
+            self.client.get(reverse('posts:group_index'))
+        self.assertEqual(len(few), len(many))
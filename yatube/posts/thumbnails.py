@@ -0,0 +1,97 @@
+"""Миниатюры картинок постов.
+
+Миниатюры строятся вне запроса, в пуле процессов, и лежат на диске под
+именем ``thumbs/<hash[:2]>/<hash>_<ширина>x<высота>.jpg``, где hash -
+sha1 исходного файла. Имя вычисляется по ``Post.image_hash`` без чтения
+картинки, поэтому страница ленты не декодирует изображения.
+
+Модуль не импортирует модели на верхнем уровне: его же загружают
+процессы пула, запущенные через spawn.
+"""
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+_executor = None
+
+
+def file_hash(file):
+    """sha1 содержимого файла, читаемого кусками."""
+
+    digest = hashlib.sha1()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def thumbnail_name(image_hash, size_name):
+    width, height = settings.THUMBNAIL_SIZES[size_name]
+    return f'thumbs/{image_hash[:2]}/{image_hash}_{width}x{height}.jpg'
+
+
+def render_thumbnail(source_path, target_path, size, quality):
+    """Вписывает картинку в ``size`` с обрезкой и пишет JPEG.
+
+    Выполняется в процессе пула, где настройки Django не загружены,
+    поэтому всё нужное приходит аргументами. Файл появляется атомарно,
+    и читатели не увидят недописанную миниатюру.
+    """
+    from PIL import Image, ImageOps
+
+    if os.path.exists(target_path):
+        return target_path
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    with Image.open(source_path) as image:
+        image = ImageOps.exif_transpose(image).convert('RGB')
+        thumb = ImageOps.fit(image, size, Image.LANCZOS)
+    partial = f'{target_path}.{os.getpid()}.part'
+    thumb.save(partial, 'JPEG', quality=quality, optimize=True)
+    os.replace(partial, target_path)
+    return target_path
+
+
+def missing_jobs(post):
+    """Аргументы ``render_thumbnail`` для ещё не готовых размеров."""
+
+    if not post.image or not post.image_hash:
+        return []
+    source = default_storage.path(post.image.name)
+    jobs = []
+    for size_name, size in settings.THUMBNAIL_SIZES.items():
+        target = default_storage.path(
+            thumbnail_name(post.image_hash, size_name))
+        if not os.path.exists(target):
+            jobs.append(
+                (source, target, tuple(size), settings.THUMBNAIL_QUALITY))
+    return jobs
+
+
+def executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            mp_context=get_context('spawn'))
+    return _executor
+
+
+def run_jobs(jobs):
+    """Строит миниатюры; при ``THUMBNAIL_WORKERS = 0`` - в этом процессе.
+
+    Возвращает future для каждого задания, чтобы команды могли дождаться
+    результата; представления их не ждут.
+    """
+    if not settings.THUMBNAIL_WORKERS:
+        for job in jobs:
+            render_thumbnail(*job)
+        return []
+    pool = executor()
+    return [pool.submit(render_thumbnail, *job) for job in jobs]
+
+
+def schedule(post):
+    return run_jobs(missing_jobs(post))
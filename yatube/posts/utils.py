@@ -1,7 +1,319 @@
-from django.core.paginator import Paginator
+import base64
+import json
+
 from django.conf import settings
+from django.core.paginator import (
+    EmptyPage, InvalidPage, Page, PageNotAnInteger, Paginator,
+)
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from .models import Post, TimelineEntry
+
+# id в курсоре сравнивается с 64-битной колонкой: большее число SQLite
+# не примет
+MAX_CURSOR_PK = 2 ** 63 - 1
+
+
+def encode_cursor(direction, pub_date, pk):
+    """Упаковывает позицию в ленте в непрозрачную строку."""
+
+    raw = json.dumps([direction, pub_date.isoformat(), pk])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Распаковывает курсор; для испорченной строки возвращает None."""
+
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        direction, pub_date, pk = json.loads(
+            base64.urlsafe_b64decode(padded.encode()).decode())
+        pub_date = parse_datetime(pub_date)
+    except (TypeError, ValueError):
+        return None
+    if direction not in ('next', 'prev') or pub_date is None:
+        return None
+    if not isinstance(pk, int) or not 0 < pk <= MAX_CURSOR_PK:
+        return None
+    return direction, pub_date, pk
+
+
+class FeedPage(Page):
+    """Страница ленты без подсчёта общего числа записей.
+
+    Первые страницы адресуются номером (``number``), более глубокие -
+    курсором; у курсорной страницы ``number`` равен None.
+    """
+
+    def __init__(self, object_list, number, paginator,
+                 has_next, has_previous):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        if self.number is None:
+            return '<Page (cursor)>'
+        return super().__repr__()
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
+    def start_index(self):
+        if self.number is None or not self.object_list:
+            return 0
+        return self.paginator.per_page * (self.number - 1) + 1
+
+    def end_index(self):
+        return self.start_index() + len(self.object_list) - 1
+
+    @property
+    def page_range(self):
+        """Номера страниц, о существовании которых уже известно."""
+
+        numbered = self.paginator.numbered_pages
+        if self.paginator._count is not None:
+            numbered = min(numbered, self.paginator.num_pages)
+        if self.number is None:
+            return range(1, numbered + 1)
+        last = self.number + 1 if self._has_next else self.number
+        return range(1, min(last, numbered) + 1)
+
+    @property
+    def next_page_query(self):
+        """Строка запроса для ссылки «Следующая»."""
+
+        if not self._has_next:
+            return ''
+        numbered = self.paginator.numbered_pages
+        if self.number is not None and self.number < numbered:
+            return f'page={self.number + 1}'
+        last = self.object_list[-1]
+        return 'cursor=' + encode_cursor('next', last.pub_date, last.pk)
+
+    @property
+    def previous_page_query(self):
+        """Строка запроса для ссылки «Предыдущая»."""
+
+        if not self._has_previous:
+            return ''
+        if self.number is not None:
+            return f'page={self.number - 1}'
+        first = self.object_list[0]
+        return 'cursor=' + encode_cursor('prev', first.pub_date, first.pk)
+
+
+class NumberedPage(Page):
+    """Обычная страница с номером и теми же ссылками, что у FeedPage."""
+
+    @property
+    def page_range(self):
+        return self.paginator.page_range
+
+    @property
+    def next_page_query(self):
+        if not self.has_next():
+            return ''
+        return f'page={self.next_page_number()}'
+
+    @property
+    def previous_page_query(self):
+        if not self.has_previous():
+            return ''
+        return f'page={self.previous_page_number()}'
+
+
+class NumberedPaginator(Paginator):
+    """Paginator для выдач, где номер страницы - единственный адрес."""
+
+    def _get_page(self, *args, **kwargs):
+        return NumberedPage(*args, **kwargs)
+
+
+class FeedPaginator(Paginator):
+    """Пагинатор ленты постов по ключу ``(pub_date, id)``.
+
+    Не выполняет ``COUNT(*)``: страница выбирается запросом
+    ``LIMIT per_page + 1``, а лишняя запись говорит о наличии продолжения.
+    Первые ``numbered_pages`` страниц доступны по номеру через OFFSET,
+    дальше лента листается курсором, и стоимость страницы не зависит
+    от глубины.
+    """
+
+    # поле-идентификатор второй части ключа сортировки
+    id_field = 'pk'
+
+    def __init__(self, object_list, per_page, numbered_pages=None,
+                 count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if numbered_pages is None:
+            numbered_pages = settings.PAGINATOR_NUMBERED_PAGES
+        self.numbered_pages = numbered_pages
+        self._count = count
+
+    @cached_property
+    def count(self):
+        """Число записей из денормализованного счётчика, если он передан."""
+
+        if self._count is not None:
+            return self._count
+        return super().count
+
+    @staticmethod
+    def keyset(queryset, id_field, cursor=None):
+        """Записи ленты по порядку ``(pub_date, id_field)`` после курсора.
+
+        Без курсора и для ``next`` - от новых к старым, для ``prev`` -
+        от старых к новым, начиная сразу за позицией курсора.
+        """
+        if cursor is None:
+            return queryset.order_by('-pub_date', f'-{id_field}')
+        direction, pub_date, pk = cursor
+        if direction == 'next':
+            return queryset.order_by('-pub_date', f'-{id_field}').filter(
+                Q(pub_date__lt=pub_date)
+                | Q(pub_date=pub_date, **{f'{id_field}__lt': pk}))
+        return queryset.order_by('pub_date', id_field).filter(
+            Q(pub_date__gt=pub_date)
+            | Q(pub_date=pub_date, **{f'{id_field}__gt': pk}))
+
+    def _fetch(self, queryset, limit):
+        return list(queryset[:limit])
+
+    def rows(self, offset=0, cursor=None):
+        """Не больше ``per_page + 1`` записей страницы: лишняя говорит
+        о продолжении."""
+
+        queryset = self.keyset(self.object_list, self.id_field, cursor)
+        return self._fetch(queryset[offset:], self.per_page + 1)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        offset = (number - 1) * self.per_page
+        rows = self.rows(offset=offset)
+        has_next = len(rows) > self.per_page
+        return FeedPage(rows[:self.per_page], number, self,
+                        has_next=has_next, has_previous=number > 1)
+
+    def cursor_page(self, cursor):
+        rows = self.rows(cursor=cursor)
+        has_more = len(rows) > self.per_page
+        if cursor[0] == 'next':
+            return FeedPage(rows[:self.per_page], None, self,
+                            has_next=has_more, has_previous=True)
+        rows = rows[:self.per_page][::-1]
+        return FeedPage(rows, None, self,
+                        has_next=True, has_previous=has_more)
+
+    def validate_number(self, number):
+        """Номер страницы без сверки с общим числом записей.
+
+        Номера дальше ``numbered_pages`` прижимаются к последней
+        нумерованной странице, дальше листать нужно курсором.
+        """
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('Номер страницы должен быть числом')
+        if number < 1:
+            raise EmptyPage('Номер страницы меньше 1')
+        return min(number, self.numbered_pages)
+
+    def get_page(self, number, cursor=None):
+        if cursor:
+            decoded = decode_cursor(cursor)
+            if decoded is not None:
+                return self.cursor_page(decoded)
+        try:
+            number = self.validate_number(number)
+        except InvalidPage:
+            number = 1
+        return self.page(number)
+
+
+class TimelinePaginator(FeedPaginator):
+    """Пагинатор по материализованной ленте ``TimelineEntry``.
+
+    Ключи страницы читаются из индекса ленты, посты догружаются одним
+    запросом ``in_bulk`` из ``posts``.
+    """
+
+    id_field = 'post_id'
+
+    def __init__(self, object_list, per_page, posts, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.posts = posts
+
+    def _fetch(self, queryset, limit):
+        ids = list(queryset.values_list('post_id', flat=True)[:limit])
+        posts = self.posts.in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+
+class FollowPaginator(TimelinePaginator):
+    """Лента подписок: строки ленты подписчика вперемешку с постами
+    авторов, чьи посты не раскладываются по лентам (``merged_authors``).
+
+    Из обоих источников читается по ``offset + per_page + 1`` записей
+    в порядке ленты, и страница вырезается из их слияния.
+    """
+
+    def __init__(self, object_list, per_page, posts, merged_authors=(),
+                 **kwargs):
+        super().__init__(object_list, per_page, posts, **kwargs)
+        self.merged_authors = list(merged_authors)
+
+    def rows(self, offset=0, cursor=None):
+        if not self.merged_authors:
+            return super().rows(offset, cursor)
+        limit = offset + self.per_page + 1
+        rows = self._fetch(
+            self.keyset(self.object_list, self.id_field, cursor), limit)
+        rows.extend(self.keyset(
+            self.posts.filter(author__in=self.merged_authors), 'pk',
+            cursor)[:limit])
+        newest_first = cursor is None or cursor[0] == 'next'
+        rows.sort(key=lambda post: (post.pub_date, post.pk),
+                  reverse=newest_first)
+        return rows[offset:limit]
+
+
+def page_list(post_list, request, count=None):
+    paginator = FeedPaginator(
+        post_list, settings.COUNT_INDEX_POSTS, count=count)
+    return paginator.get_page(
+        request.GET.get('page'), cursor=request.GET.get('cursor'))
+
+
+def follow_page_list(user, request, merged_authors):
+    paginator = FollowPaginator(
+        TimelineEntry.objects.filter(
+            feed_key=TimelineEntry.follow_key(user.pk)),
+        settings.COUNT_INDEX_POSTS,
+        posts=Post.objects.select_related('author', 'group'),
+        merged_authors=merged_authors,
+    )
+    return paginator.get_page(
+        request.GET.get('page'), cursor=request.GET.get('cursor'))
 
 
-def page_list(post_list, request):
-    paginator = Paginator(post_list, settings.COUNT_INDEX_POSTS)
-    return paginator.get_page(request.GET.get('page'))
+def timeline_page_list(feed_key, request, count=None):
+    paginator = TimelinePaginator(
+        TimelineEntry.objects.filter(feed_key=feed_key),
+        settings.COUNT_INDEX_POSTS,
+        posts=Post.objects.select_related('author', 'group'),
+        count=count
+    )
+    return paginator.get_page(
+        request.GET.get('page'), cursor=request.GET.get('cursor'))
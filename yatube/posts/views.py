@@ -1,49 +1,133 @@
+from urllib.parse import urlencode
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.db.models import F
 
 from django.shortcuts import redirect, render, get_object_or_404
-from .forms import PostForm
-from .models import Post, Group, User
-from .utils import page_list
-
-
+from django.views.decorators.http import require_POST
+
+from core.db import serialized_write
+from core.routers import read_from_replica
+from . import follow
+from .cache import FOLLOW_PLACEHOLDER, cache_feed_page
+from .conditions import (
+    conditional_page, group_state, index_state, post_state, profile_state,
+)
+from .export import export_response
+from .forms import PostForm, PostImageForm
+from .models import Post, PostCounter, Group, TimelineEntry, User
+from .search import search_posts
+from .utils import (
+    NumberedPaginator, follow_page_list, page_list, timeline_page_list,
+)
+
+
+@read_from_replica
+@conditional_page(index_state)
+@cache_feed_page(lambda: ('index',))
 def index(request):
     """Главная страница."""
 
-    post_list = Post.objects.select_related('author', 'group')
-    page_obj = page_list(post_list, request)
+    posts_count = PostCounter.get_value(PostCounter.TOTAL)
+    page_obj = timeline_page_list(TimelineEntry.ALL, request, posts_count)
     return render(request, 'posts/index.html', {'page_obj': page_obj})
 
 
+@read_from_replica
+@conditional_page(group_state)
+@cache_feed_page(lambda slug: (f'group:{slug}',))
 def group_posts(request, slug):
     """вывод записей одной из групп. """
 
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.select_related('author', 'group')
-    page_obj = page_list(posts, request)
+    posts_count = PostCounter.get_value(PostCounter.group_key(group.pk))
+    page_obj = timeline_page_list(
+        TimelineEntry.group_key(group.pk), request, posts_count)
     return render(request, 'posts/group_list.html', {'group': group,
                                                      'page_obj': page_obj})
 
 
+@read_from_replica
+def group_index(request):
+    """каталог групп, самые недавно активные первыми. """
+
+    groups = Group.objects.select_related('stats').order_by(
+        F('stats__last_post_at').desc(nulls_last=True), 'title')
+    paginator = NumberedPaginator(groups, settings.COUNT_GROUPS)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    counts = dict(PostCounter.objects.filter(key__in=[
+        PostCounter.group_key(group.pk) for group in page_obj
+    ]).values_list('key', 'value'))
+    for group in page_obj:
+        group.posts_count = counts.get(PostCounter.group_key(group.pk), 0)
+    return render(request, 'posts/group_index.html', {'page_obj': page_obj})
+
+
+@read_from_replica
+@conditional_page(profile_state)
+@cache_feed_page(
+    lambda username: (f'profile:{username}', 'groups'),
+    fragments={FOLLOW_PLACEHOLDER: follow.render_follow_button})
 def profile(request, username):
     """вывод списка всех записей пользователя. """
 
     user = get_object_or_404(User, username=username)
-    post_list = user.posts.select_related('author')
-    page_obj = page_list(post_list, request)
+    post_list = user.posts.select_related('author', 'group')
+    posts_count = PostCounter.get_value(PostCounter.author_key(user.pk))
+    page_obj = page_list(post_list, request, posts_count)
     return render(request, 'posts/profile.html', {
         'author': user,
         'page_obj': page_obj
     })
 
 
+def profile_export(request, username):
+    """выгрузка всех записей пользователя в JSONL. """
+
+    user = get_object_or_404(User, username=username)
+    return export_response(user.posts.all(), 'jsonl', f'{username}.jsonl')
+
+
+def group_export(request, slug):
+    """выгрузка всех записей группы в CSV. """
+
+    group = get_object_or_404(Group, slug=slug)
+    return export_response(group.posts.all(), 'csv', f'{slug}.csv')
+
+
+def search(request):
+    """поиск записей по тексту. """
+
+    query = request.GET.get('q', '').strip()
+    page_obj = None
+    if query:
+        results = search_posts(query, settings.SEARCH_RESULTS_LIMIT)
+        paginator = NumberedPaginator(results, settings.COUNT_INDEX_POSTS)
+        page_obj = paginator.get_page(request.GET.get('page'))
+    return render(request, 'posts/search.html', {
+        'query': query,
+        'page_obj': page_obj,
+        'query_prefix': urlencode({'q': query}) + '&',
+    })
+
+
+@read_from_replica
+@conditional_page(post_state)
 def post_detail(request, post_id):
     """подробная информация о записи. """
 
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), pk=post_id)
+    author_posts_count = PostCounter.get_value(
+        PostCounter.author_key(post.author_id))
     return render(
         request,
         'posts/post_detail.html',
-        {'post_detail': post}
+        {
+            'post_detail': post,
+            'author_posts_count': author_posts_count,
+        }
     )
 
 
@@ -52,13 +136,19 @@ def post_create(request):
     """добавление новой записи в базу. """
 
     form = PostForm(request.POST or None)
+    image_form = PostImageForm(
+        request.POST or None, request.FILES or None, instance=form.instance)
     if request.method == 'POST':
-        if form.is_valid():
+        if all([form.is_valid(), image_form.is_valid()]):
             post = form.save(commit=False)
             post.author = request.user
-            post.save()
+            with serialized_write():
+                post.save()
             return redirect('posts:profile', request.user.username)
-    return render(request, 'posts/create_post.html', {'form': form})
+    return render(request, 'posts/create_post.html', {
+        'form': form,
+        'image_form': image_form,
+    })
 
 
 @login_required
@@ -67,18 +157,54 @@ def post_edit(request, post_id):
 
     post = get_object_or_404(Post, pk=post_id)
     form = PostForm(request.POST or None, instance=post)
-    if request.user != post.author:
+    image_form = PostImageForm(
+        request.POST or None, request.FILES or None, instance=post)
+    if request.user.pk != post.author_id:
         return redirect('posts:post_detail', post_id)
     if request.method == 'POST':
-        if form.is_valid():
-            form.save()
+        if all([form.is_valid(), image_form.is_valid()]):
+            with serialized_write():
+                form.save()
             return redirect('posts:post_detail', post_id)
     return render(
         request,
         'posts/create_post.html',
         {
             'form': form,
+            'image_form': image_form,
             'is_edit': True,
             'post_id': post_id
         }
     )
+
+
+@login_required
+def follow_index(request):
+    """лента постов авторов, на которых подписан пользователь. """
+
+    page_obj = follow_page_list(
+        request.user, request, follow.merged_authors(request.user))
+    return render(request, 'posts/follow.html', {'page_obj': page_obj})
+
+
+@login_required
+@require_POST
+def profile_follow(request, username):
+    """подписка на автора. """
+
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        with serialized_write():
+            follow.follow(request.user, author)
+    return redirect('posts:profile', username)
+
+
+@login_required
+@require_POST
+def profile_unfollow(request, username):
+    """отписка от автора. """
+
+    author = get_object_or_404(User, username=username)
+    with serialized_write():
+        follow.unfollow(request.user, author)
+    return redirect('posts:profile', username)
@@ -24,8 +24,38 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
 ]
 
+# отдавать ли клиенту время SQL и шаблонов в заголовке Server-Timing
+SERVER_TIMING_HEADER = True
+# доля запросов, которые профилируются cProfile без токена
+PROFILING_SAMPLE_RATE = 0 if DEBUG else 0.001
+PROFILING_DIR = os.path.join(BASE_DIR, 'profiles')
+# сколько последних профилей хранить на диске
+PROFILING_MAX_FILES = 500
+# сколько секунд действует токен из python manage.py profile_token
+PROFILING_TOKEN_MAX_AGE = 60 * 60
+# строка JSON на каждый запрос пишется в логгер core.timing на уровне INFO
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.timing': {
+            'handlers': ['console'],
+            'level': os.environ.get(
+                'TIMING_LOG_LEVEL', 'WARNING' if DEBUG else 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 MIDDLEWARE = [
+    'core.middleware.ServerTimingMiddleware',
+    'core.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.StaticFilesMiddleware',
+    'core.middleware.ReplicaStickinessMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -36,13 +66,34 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'yatube.urls'
 
+# 'debug' - шаблоны перечитываются с диска на каждый запрос;
+# 'production' - компилируются один раз, без HTML-комментариев и отступов
+TEMPLATE_MODE = os.environ.get(
+    'TEMPLATE_MODE', 'debug' if DEBUG else 'production')
+TEMPLATE_LOADERS = {
+    'debug': [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ],
+    'production': [
+        ('django.template.loaders.cached.Loader', [
+            'core.loaders.FilesystemLoader',
+            'core.loaders.AppDirectoriesLoader',
+        ]),
+    ],
+}
+# комментарии с такими префиксами загрузчик 'production' сохраняет
+TEMPLATE_KEEP_COMMENTS = ['<!-- page-cache:']
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates, который считает время рендеринга для
+        # core.middleware.ServerTimingMiddleware
+        'BACKEND': 'core.timing.TimedDjangoTemplates',
         # Добавлено: Искать шаблоны на уровне проекта
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS[TEMPLATE_MODE],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -60,8 +111,73 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+    },
+    # копия default, которую обновляет python manage.py snapshot_replica
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db_replica.sqlite3'),
+        'TEST': {'MIRROR': 'default'},
+    },
 }
+# выполняются на каждом новом соединении SQLite (core.signals):
+# WAL позволяет читать во время записи, NORMAL в WAL не теряет
+# целостность и не делает fsync на каждый коммит
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    # отрицательное значение - размер в КиБ
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+}
+# записи из views идут по одной на процесс (core.db.serialized_write)
+SQLITE_SERIALIZE_WRITES = True
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# алиасы баз, с которых читают ленты и страницы постов; пусто - только
+# default. Локально: DATABASE_REPLICAS=replica и снимок snapshot_replica
+DATABASE_REPLICAS = os.environ.get('DATABASE_REPLICAS', '').split()
+# сколько секунд после своей записи пользователь читает с default
+REPLICA_STICKY_SECONDS = 30
+# сколько секунд живёт страница, собранная по данным реплики: сигнал
+# о новом снимке приходит только в процесс snapshot_replica
+REPLICA_PAGE_CACHE_TIMEOUT = 30
+
+CACHES = {
+    # страницы лент и карточки постов; сигналы сбрасывают страницы только
+    # в процессе, который писал в базу, поэтому кэш общий для всех
+    # процессов: файловый - в пределах одной машины, при нескольких
+    # машинах нужен memcached или redis. С LocMemCache проверка posts.E001
+    # не даёт запустить сервер
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    # сессии и пользователи сессий; кэш локален для процесса, при
+    # нескольких процессах нужен общий (memcached, redis)
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sessions',
+        'TIMEOUT': 60 * 60,
+    },
+}
+# Кэш готовых страниц лент; записи сбрасываются сигналами, а не по TTL,
+# поэтому алиас должен указывать на общий кэш (см. CACHES)
+PAGE_CACHE_ALIAS = 'default'
+# Срок жизни отрендеренной карточки поста; ключ версионирован правками
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# сессия читается из кэша, запись идёт и в кэш, и в django_session
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'sessions'
+# ModelBackend оставлен вторым: сессии, выданные до CachedModelBackend,
+# ссылаются на него и остаются рабочими
+AUTHENTICATION_BACKENDS = [
+    'core.auth.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+# сколько секунд другой процесс может видеть устаревшего пользователя
+USER_CACHE_TIMEOUT = 5 * 60
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -86,15 +202,55 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+# сборка: python manage.py collectstatic - файлы с хэшем, манифест и .gz
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStorage'
+# файлы с хэшем в имени неизменяемы и кэшируются клиентом на год
+STATIC_MAX_AGE = 60 * 60 * 24 * 365
+STATIC_FALLBACK_MAX_AGE = 60
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# размеры миниатюр картинок постов: имя -> (ширина, высота)
+THUMBNAIL_SIZES = {
+    'card': (960, 339),
+    'detail': (960, 640),
+}
+THUMBNAIL_QUALITY = 85
+# процессов в пуле миниатюр; 0 - строить в текущем процессе
+THUMBNAIL_WORKERS = 2
 # Количество выводимых постов на странице
 COUNT_INDEX_POSTS = os.environ.get('COUNT_INDEX_POSTS', 10)
 COUNT_GROUP_POSTS = os.environ.get('COUNT_GROUP_POSTS', 10)
+# У автора с большим числом подписчиков посты не раскладываются по лентам
+# подписок при публикации, а подмешиваются в ленту при чтении
+FOLLOW_FANOUT_MAX_FOLLOWERS = int(
+    os.environ.get('FOLLOW_FANOUT_MAX_FOLLOWERS', 1000))
+# Так же читаются авторы с большим числом постов: новая подписка
+# копирует в ленту все посты автора
+FOLLOW_FANOUT_MAX_POSTS = int(os.environ.get('FOLLOW_FANOUT_MAX_POSTS', 1000))
+# Групп на странице каталога /groups/
+COUNT_GROUPS = int(os.environ.get('COUNT_GROUPS', 50))
+# Сколько первых страниц ленты доступны по номеру, дальше - по курсору
+PAGINATOR_NUMBERED_PAGES = int(os.environ.get('PAGINATOR_NUMBERED_PAGES', 5))
+# Сколько лучших совпадений поиска можно пролистать
+SEARCH_RESULTS_LIMIT = 500
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'
 
+# письма из запросов ложатся в очередь core.models.OutboxMessage,
+# отправляет их python manage.py send_queued_mail --interval 5
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
 #  подключаем движок filebased.EmailBackend
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+OUTBOX_EMAIL_BACKEND = os.environ.get(
+    'OUTBOX_EMAIL_BACKEND', 'django.core.mail.backends.filebased.EmailBackend')
+# писем за одно соединение с почтовым сервером
+OUTBOX_BATCH_SIZE = 100
+# после стольких ошибок письмо больше не отправляется
+OUTBOX_MAX_ATTEMPTS = 5
+# отсрочка после первой ошибки, секунды; дальше удваивается
+OUTBOX_RETRY_DELAY = 60
 # указываем директорию, в которую будут складываться файлы писем
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')